@@ -1,18 +1,33 @@
 # JamieBot/app/api/comment_routes.py
-from fastapi import APIRouter, HTTPException
+import io
+import json
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter, ValidationError
 from app.schemas import CommentRequest, CommentResponse
 from app.comment_system.logic import CommentLogic
+from app.comment_system.throttle import create_throttle, throttle_key
+from app.config import Config
 
 router = APIRouter()
 logic = CommentLogic()
+throttle = create_throttle()
+batch_adapter = TypeAdapter(List[CommentRequest])
+comment_adapter = TypeAdapter(CommentRequest)
 
 @router.post("/process-comment", response_model=CommentResponse)
 def process_comment(request: CommentRequest):
     try:
         # 1. Detect Intent
         intent = logic.detect_intent(request.comment_text)
+
+        # 2. Skip repeat commenters within the cooldown
+        if not throttle.allow(throttle_key(request.platform, request.post_id, request.user_id)):
+            return CommentResponse(reply_text="", intent_detected=intent, action="IGNORE")
         
-        # 2. Select Template
+        # 3. Select Template
         reply = logic.select_template(intent, request.platform)
         
         return CommentResponse(
@@ -22,4 +37,70 @@ def process_comment(request: CommentRequest):
         )
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _batch_too_large(count) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Batch too large ({count} > {Config.COMMENT_BATCH_MAX})")
+
+def _parse_ndjson(body: bytes) -> List[CommentRequest]:
+    """
+    One CommentRequest per non-empty line. Stops as soon as the batch is over COMMENT_BATCH_MAX;
+    a bad line is reported by its position in the batch (loc[0], as for JSON arrays) and its line number.
+    """
+    comments = []
+    for number, line in enumerate(io.BytesIO(body), 1):
+        if not line.strip(): continue
+        if len(comments) == Config.COMMENT_BATCH_MAX: raise _batch_too_large(f"{len(comments)}+")
+        try:
+            comments.append(comment_adapter.validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=[
+                {**error, "loc": (len(comments), *error["loc"]), "line": number}
+                for error in e.errors(include_url=False, include_context=False, include_input=False)
+            ])
+    return comments
+
+def _process_batch(comments: List[CommentRequest]) -> List[dict]:
+    # 1. Detect Intent (whole batch, memoized by normalized text)
+    intents = logic.detect_intents([c.comment_text for c in comments])
+
+    # 2. Skip repeat commenters (across batches and within this one)
+    allowed = throttle.allow_many([throttle_key(c.platform, c.post_id, c.user_id) for c in comments])
+
+    # 3. Select Template; plain dicts skip per-item response model validation
+    return [
+        {"reply_text": logic.select_template(intent, comment.platform), "intent_detected": intent, "action": "POST_REPLY"}
+        if ok else {"reply_text": "", "intent_detected": intent, "action": "IGNORE"}
+        for comment, intent, ok in zip(comments, intents, allowed)
+    ]
+
+@router.post("/process-comments", response_model=List[CommentResponse])
+async def process_comments(request: Request):
+    """
+    Batch /process-comment. Body is a JSON array of CommentRequest objects, or NDJSON
+    (one object per line, Content-Type: application/x-ndjson, answered as NDJSON).
+    Replies come back in the same order.
+    """
+    body = await request.body()
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    if ndjson:
+        comments = _parse_ndjson(body)
+    else:
+        try:
+            comments = batch_adapter.validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+        if len(comments) > Config.COMMENT_BATCH_MAX: raise _batch_too_large(len(comments))
+
+    # CPU-bound for big batches, so keep it off the event loop
+    results = await run_in_threadpool(_process_batch, comments)
+
+    if ndjson:
+        lines = "\n".join(json.dumps(r, ensure_ascii=False) for r in results)
+        return Response(content=lines + "\n", media_type="application/x-ndjson")
+    return JSONResponse(content=results)
+
+@router.get("/stats/comment-throttle")
+def comment_throttle_stats():
+    """Replies allowed vs. suppressed by the per-commenter cooldown"""
+    return throttle.snapshot()
\ No newline at end of file
@@ -0,0 +1,88 @@
+# JamieBot/app/api/dependencies.py
+import asyncio
+import logging
+import time
+from typing import Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+class Services:
+    """
+    Everything the DM routes share, built once per worker process.
+    Built after fork (lifespan warm-up or first request), never at import: the OpenAI SDK,
+    prompts and connection pools are per process, and the app boots without credentials.
+    """
+    def __init__(self):
+        # Imported here so `import app.main` stays cheap (openai alone is ~0.5s)
+        from app.config import Config
+        from app.orchestrator import Orchestrator
+        from app.services.redis_service import RedisService
+        from app.services.summarizer import ConversationSummarizer
+        from app.services.followups import FollowUpScheduler
+        from app.services.coalescer import TurnCoalescer
+        from app.services.turn_recorder import TurnRecorder
+        from app.services.admission import AdmissionController
+
+        self.orchestrator = Orchestrator()
+        self.redis_service = RedisService()
+        self.summarizer = ConversationSummarizer(self.orchestrator.llm_service, self.redis_service)
+        self.followups = FollowUpScheduler(self.orchestrator.llm_service, self.redis_service, self.orchestrator.prompts)
+        self.recorder = TurnRecorder(Config.RECORD_TURNS_DIR, Config.RECORD_SAMPLE_RATE)
+        self.coalescer = TurnCoalescer(Config.COALESCE_WINDOW_SECONDS, Config.COALESCE_MAX_WAIT_SECONDS, Config.COALESCE_MAX_MESSAGES)
+        self.admission = AdmissionController(Config.ADMISSION_MAX_CONCURRENT, Config.ADMISSION_MAX_QUEUE, Config.ADMISSION_MAX_WAIT_SECONDS)
+
+    async def close(self):
+        await self.followups.stop()
+        # The join waits out an in-flight reload; keep it off the event loop
+        await asyncio.to_thread(self.orchestrator.prompts.stop_watcher)
+        await self.redis_service.client.aclose()
+        await self.orchestrator.llm_service.client.close()
+
+_services: Optional[Services] = None
+_building: Optional[asyncio.Future] = None
+startup = {"build_seconds": None, "error": None}
+
+def _build() -> Services:
+    started = time.perf_counter()
+    services = Services()
+    startup["build_seconds"] = round(time.perf_counter() - started, 3)
+    return services
+
+async def init_services() -> Services:
+    """
+    Builds the services in a thread (imports and prompt loading block), once;
+    concurrent callers wait for the same build. A failed build is retried by the next caller.
+    """
+    global _services, _building
+    if _services is not None: return _services
+    if _building is None:
+        _building = asyncio.ensure_future(asyncio.to_thread(_build))
+    building = _building
+    try:
+        _services = await asyncio.shield(building)
+        startup["error"] = None
+        # Whichever caller built them (lifespan warm-up or a first request); no-op unless FOLLOWUP_ENABLED
+        _services.followups.start()
+    except Exception as e:
+        startup["error"] = f"{type(e).__name__}: {e}"
+        if _building is building: _building = None
+        raise
+    return _services
+
+def current_services() -> Optional[Services]:
+    """The services if already built (never triggers a build)."""
+    return _services
+
+async def get_services() -> Services:
+    """FastAPI dependency for the DM routes: 503 while the services can't be built."""
+    try:
+        return await init_services()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service not ready: {e}")
+
+async def shutdown_services():
+    global _services, _building
+    if _services is not None:
+        await _services.close()
+    _services, _building = None, None
@@ -0,0 +1,30 @@
+# JamieBot/app/api/health_routes.py
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.api.dependencies import current_services, startup
+
+router = APIRouter()
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process serves requests. Needs no credentials, Redis or OpenAI."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """
+    Readiness: services built (prompts loaded, OpenAI client configured) and Redis answering.
+    503 while the worker is still warming up or a dependency is down.
+    """
+    services = current_services()
+    checks = {"services": "ok" if services else (startup["error"] or "starting")}
+    if services:
+        try:
+            await asyncio.wait_for(services.redis_service.client.ping(), timeout=1.0)
+            checks["redis"] = "ok"
+        except Exception as e:
+            checks["redis"] = f"{type(e).__name__}: {e}"
+    ready = all(value == "ok" for value in checks.values())
+    body = {"status": "ready" if ready else "not_ready", "checks": checks, "build_seconds": startup["build_seconds"]}
+    return JSONResponse(body, status_code=200 if ready else 503)
@@ -1,52 +1,239 @@
 # JamieBot/app/api/routes.py
-from fastapi import APIRouter, HTTPException
-from app.schemas import AIRequest, AIResponse
-from app.orchestrator import Orchestrator
+import json
+import logging
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from openai import APITimeoutError
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.schemas import AIRequest, AIResponse, FollowUpBatch
 from app.state_machine.states import ConversationState
-from app.services.redis_service import RedisService
+from app.services.redis_service import SessionConflict
+from app.services.summarizer import with_summary
+from app.services.admission import AdmissionRejected
+from app.scoring import calculate_score
+from app.api.dependencies import Services, get_services
+from app.config import Config
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-orchestrator = Orchestrator()
-redis_service = RedisService()
 
-@router.post("/process-message", response_model=AIResponse)
-def process_message(request: AIRequest):
+async def _load_turn(services: Services, request: AIRequest, behind: bool = False):
+    """
+    Loads session + history in one round trip and resolves where state comes from:
+    the request (explicit mode, as before) or the server-side session (current_state omitted).
+    `behind`: the turn queued behind another turn of this user.
+    Returns (current_state, attributes, history, expected_version).
+    """
+    session, history = await services.redis_service.load_session(request.user_id, limit=Config.HISTORY_CONTEXT_MESSAGES)
+    if request.session_version is not None and request.session_version != session.version:
+        raise HTTPException(status_code=409, detail=f"Stale session_version {request.session_version}, current is {session.version}")
+
+    if request.current_state is None:
+        state_name, attributes, expected_version = session.state or ConversationState.ENTRY.value, session.attributes, session.version
+    else:
+        # Explicit clients keep last-write-wins unless they opt into versioning
+        state_name, attributes, expected_version = request.current_state, request.user_attributes, request.session_version
+        # ...but a turn queued behind another starts from what that turn saved: the state the client
+        # sent predates it, and re-running from it would repeat the transition
+        if behind and request.session_version is None and session.state:
+            state_name, attributes, expected_version = session.state, session.attributes, session.version
+
+    if state_name not in ConversationState.__members__:
+        raise HTTPException(status_code=400, detail=f"Invalid state: {state_name}")
+    return ConversationState[state_name], attributes, with_summary(session, history), expected_version
+
+async def _save_turn(services: Services, request: AIRequest, attributes, result: dict, expected_version) -> AIResponse:
     try:
-        # 1. Retrieve History from Redis
-        history = redis_service.get_history(request.user_id)
-        
-        # 2. Validate State
-        if request.current_state not in ConversationState.__members__:
-            raise HTTPException(status_code=400, detail=f"Invalid state: {request.current_state}")
-        
-        current_state = ConversationState[request.current_state]
-        
-        # 3. Process Message (Pass History)
-        result = orchestrator.process_message(
+        version = await services.redis_service.save_turn(
+            request.user_id,
+            state=result["next_state"],
+            attributes=result.get("extracted_attributes", attributes) or {},
             user_message=request.message,
-            current_state=current_state,
-            extracted_attributes=request.user_attributes,
-            history=history 
-        )
-        
-        # 4. Save Interaction to Redis (Memory)
-        redis_service.add_message(request.user_id, "user", request.message)
-        redis_service.add_message(request.user_id, "assistant", result["reply"])
-        
-        return AIResponse(
             reply=result["reply"],
-            next_state=result["next_state"],
-            extracted_attributes=result.get("extracted_attributes"),
-            progress_score=result["progress_score"] # <--- ADDED THIS LINE
+            expected_version=expected_version
         )
+    except SessionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    # Fold older messages into the rolling summary after the reply is out
+    services.summarizer.schedule(request.user_id)
+    # Re-arms the 10 min / 24 h nudges and cancels any still pending
+    await services.followups.record_activity(request.user_id)
+
+    return AIResponse(
+        reply=result["reply"],
+        next_state=result["next_state"],
+        # Session-mode clients don't need the attributes echoed back
+        extracted_attributes=result.get("extracted_attributes") if request.current_state is not None else None,
+        progress_score=result["progress_score"],
+        session_version=version
+    )
+
+def _admission(services: Services, current_state: ConversationState):
+    """Slot factory for the orchestrator: only turns that generate a reply with the LLM take one."""
+    return lambda: services.admission.slot(calculate_score(current_state))
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def _run_turn(services: Services, request: AIRequest, behind: bool = False) -> AIResponse:
+    # 1. Retrieve Session + History from Redis, Validate State
+    current_state, attributes, history, expected_version = await _load_turn(services, request, behind)
+    
+    # 2. Process Message (Pass History), recorded for replay when RECORD_TURNS_DIR is set.
+    #    Reply generation waits for an LLM slot; under load, leads closest to booking go first
+    try:
+        with services.recorder.turn(request.user_id, request.message, current_state.value, attributes, history) as recording:
+            result = await services.orchestrator.process_message(
+                user_message=request.message,
+                current_state=current_state,
+                extracted_attributes=attributes,
+                history=history,
+                admit=_admission(services, current_state)
+            )
+            recording.result = result
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    
+    # 3. Save Session + Interaction to Redis (Memory)
+    return await _save_turn(services, request, attributes, result, expected_version)
+
+@router.post("/process-message", response_model=AIResponse)
+async def process_message(request: AIRequest, services: Services = Depends(get_services)):
+    try:
+        # Serialized per user; a burst of DMs becomes one turn with one reply
+        response, merged = await services.coalescer.submit(request, lambda merged_request, behind: _run_turn(services, merged_request, behind))
+        if merged: return response.model_copy(update={"reply": "", "merged": True})
+        return response
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except APITimeoutError:
+        # Retries are exhausted by now (see LLM_TIMEOUTS / LLM_RETRIES)
+        raise HTTPException(status_code=504, detail="Model timed out, please retry")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/process-message/stream")
+async def process_message_stream(request: AIRequest, services: Services = Depends(get_services)):
+    """
+    Same turn as /process-message, streamed as Server-Sent Events:
+    `token` events carry reply text as it is generated, a final `done` event carries the AIResponse.
+    History is saved only after the stream completes.
+    """
+    # The response starts with the turn's first chunk: the turn lock, the state/version checks and
+    # (for generated replies) the LLM slot all come before any byte is sent, so a bad request still
+    # gets its 400 / 409 and a full queue its 429 / 503 with Retry-After
+    held = AsyncExitStack()
+    try:
+        # Same per-user ordering as /process-message (streams are not merged)
+        user_lock = await held.enter_async_context(services.coalescer.serialized(request.user_id))
+        current_state, attributes, history, expected_version = await _load_turn(services, request, user_lock.waited)
+        stream = services.orchestrator.stream_message(
+            user_message=request.message,
+            current_state=current_state,
+            extracted_attributes=attributes,
+            history=history,
+            admit=_admission(services, current_state)
+        )
+        held.push_async_callback(stream.aclose)  # releases the slot if the stream is abandoned
+        first = await anext(stream)
+    except BaseException as e:
+        await held.aclose()
+        if isinstance(e, AdmissionRejected): raise _rejected(e)
+        if isinstance(e, APITimeoutError): raise HTTPException(status_code=504, detail="Model timed out, please retry")
+        raise
+
+    async def chunks():
+        yield first
+        async for chunk in stream: yield chunk
+
+    async def events():
+        try:
+            async for kind, payload in chunks():
+                if kind == "token":
+                    yield _sse("token", {"text": payload})
+                    continue
+                response = await _save_turn(services, request, attributes, payload, expected_version)
+                yield _sse("done", response.model_dump())
+        except HTTPException as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            # Headers are already sent, so errors go in-band
+            logger.error(f"Stream Error: {e}")
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            await held.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also releases the lock and slot when the client left before the stream started (no-op otherwise)
+        background=BackgroundTask(held.aclose)
+    )
+
+@router.post("/followups/pull", response_model=FollowUpBatch)
+async def pull_followups(limit: int = Query(default=50, ge=1, le=500), services: Services = Depends(get_services)):
+    """
+    Hands out generated follow-up nudges for the backend to send (each one is returned once).
+    """
+    return FollowUpBatch(followups=await services.followups.pull(limit))
+
+@router.get("/stats/followups")
+async def followup_stats(services: Services = Depends(get_services)):
+    """Users waiting per follow-up kind and nudges waiting to be pulled"""
+    return await services.followups.snapshot()
+
+@router.get("/stats/admission")
+async def admission_stats(services: Services = Depends(get_services)):
+    """Turns running vs. queued for an LLM slot, queue wait percentiles and rejections"""
+    return services.admission.snapshot()
+
+@router.get("/stats/coalescing")
+async def coalescing_stats(services: Services = Depends(get_services)):
+    """Messages vs. turns run: how many burst DMs were answered together"""
+    return services.coalescer.snapshot()
+
+@router.get("/stats/speculation")
+async def speculation_stats(services: Services = Depends(get_services)):
+    """Hit rate and latency saved by speculative generation, per state"""
+    orchestrator = services.orchestrator
+    return {
+        "enabled": orchestrator.speculative,
+        "speculative_states": sorted(state.value for state in orchestrator.speculative_states),
+        "states": orchestrator.speculation_stats.snapshot()
+    }
+
+@router.get("/stats/extraction")
+async def extraction_stats(services: Services = Depends(get_services)):
+    """How many attribute extractions were answered locally vs. by the LLM"""
+    return services.orchestrator.llm_service.extraction_stats.snapshot()
+
+@router.get("/stats/llm-cache")
+async def llm_cache_stats(services: Services = Depends(get_services)):
+    """Hit/miss/eviction counters of the classifier response cache"""
+    return services.orchestrator.llm_service.classifier_cache.snapshot()
+
+@router.get("/stats/llm-latency")
+async def llm_latency_stats(services: Services = Depends(get_services)):
+    """Retries, timeouts and hedges per LLM call type, with primary vs. effective latency percentiles"""
+    return services.orchestrator.llm_service.latency_policy.snapshot()
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus exposition: per-step turn latency, LLM calls/tokens, Redis ops, state transitions"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @router.delete("/clear-history/{user_id}")
-def clear_history(user_id: str):
+async def clear_history(user_id: str, services: Services = Depends(get_services)):
     """Utility to reset a user's memory"""
-    redis_service.clear_history(user_id)
+    await services.redis_service.clear_history(user_id)
     return {"status": "cleared"}
\ No newline at end of file
@@ -5,7 +5,8 @@ KEYWORDS = {
     "PRICE": [
         "price", "cost", "how much", "charge", "$", "expensive", "cheap", "money", 
         "payment", "fee", "rates", "discount", "offer", "sale", "budget", "value", 
-        "costing", "affordable", "high cost", "low cost", "pricing", "premium", "bargain"
+        "costing", "affordable", "high cost", "low cost", "pricing", "premium", "bargain",
+        "prices", "costs"
     ],
     "ELIGIBILITY": [
         "beginners", "old", "young", "work for me", "requirements", "start", 
@@ -16,10 +17,11 @@ KEYWORDS = {
     "INTEREST": [
         "interested", "info", "details", "yes", "please", "want this", "link", 
         "sent", "dm", "how to join", "join", "sign up", "register", "tell me more", 
-        "sign me up", "count me in", "apply", "get started", "I’m in", "send me info"
+        "sign me up", "count me in", "apply", "get started", "I’m in", "send me info",
+        "links", "I'm in"
     ],
     "GENERIC": [
-        "🔥", "❤️", "wow", "great", "cool", "thanks", "amazing", "love", 
+        "🔥", "❤️", "wow", "great", "cool", "thanks", "amazing", "love*", 
         "beautiful", "awesome", "👏", "🙌", "fantastic", "incredible", "wowza", 
         "unbelievable", "superb", "outstanding", "brilliant", "perfect", "so good", 
         "inspiring", "epic", "legendary", "good vibes", "high five", "👌"
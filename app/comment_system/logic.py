@@ -1,28 +1,30 @@
 # JamieBot/app/comment_system/logic.py
 import random
+from functools import lru_cache
+from typing import Dict, List
 from app.comment_system.data import KEYWORDS, TEMPLATES
+from app.keyword_matcher import KeywordMatcher
+
+# Priority Order: Price > Eligibility > Interest > Generic
+INTENT_PRIORITY = ["PRICE", "ELIGIBILITY", "INTEREST", "GENERIC"]
+INTENT_MATCHER = KeywordMatcher(KEYWORDS)
 
 class CommentLogic:
     def normalize(self, text: str) -> str:
-        return text.lower().strip()
+        # Collapsing whitespace also lets "info  pls" and "info pls" share a memoized result
+        return " ".join(text.lower().split())
 
     def detect_intent(self, text: str) -> str:
-        text = self.normalize(text)
-        
-        # Priority Order: Price > Eligibility > Interest > Generic
-        if any(k in text for k in KEYWORDS["PRICE"]):
-            return "PRICE"
-            
-        if any(k in text for k in KEYWORDS["ELIGIBILITY"]):
-            return "ELIGIBILITY"
-            
-        if any(k in text for k in KEYWORDS["INTEREST"]):
-            return "INTEREST"
-            
-        if any(k in text for k in KEYWORDS["GENERIC"]):
-            return "GENERIC"
-            
-        return "UNKNOWN"
+        return _intent_for(self.normalize(text))
+
+    def detect_intents(self, texts: List[str]) -> List[str]:
+        """
+        Batch version of detect_intent: each distinct normalized comment is matched once
+        (viral posts are mostly the same emoji / "info" over and over).
+        """
+        normalized = [self.normalize(t) for t in texts]
+        intents: Dict[str, str] = {text: _intent_for(text) for text in set(normalized)}
+        return [intents[text] for text in normalized]
 
     def select_template(self, intent: str, platform: str) -> str:
         # Normalize platform to uppercase to handle "instagram", "Instagram", "INSTAGRAM"
@@ -45,4 +47,8 @@ class CommentLogic:
             # Example adaptation if needed later
             pass
             
-        return base_reply
\ No newline at end of file
+        return base_reply
+
+@lru_cache(maxsize=65536)
+def _intent_for(normalized_text: str) -> str:
+    return INTENT_MATCHER.first(normalized_text, INTENT_PRIORITY) or "UNKNOWN"
\ No newline at end of file
@@ -0,0 +1,106 @@
+# JamieBot/app/comment_system/throttle.py
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import redis
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+ThrottleKey = Tuple[str, str, str]  # (platform, post_id, user_id)
+
+def throttle_key(platform: Optional[str], post_id: Optional[str], user_id: str) -> ThrottleKey:
+    return ((platform or "UNKNOWN").upper().strip(), post_id or "", user_id)
+
+class ReplyThrottle:
+    """
+    One public reply per (platform, post_id, user_id) per cooldown window.
+    Entries are kept in expiry order, so expired ones are dropped from the front in O(1);
+    past max_entries the oldest window is forgotten early (that commenter may get one extra reply).
+    Keys are stored as 64-bit hashes, ~150 bytes per tracked commenter.
+    """
+    def __init__(self, cooldown: float, max_entries: int):
+        self.cooldown = cooldown
+        self.max_entries = max_entries
+        self._expires: "OrderedDict[int, float]" = OrderedDict()  # hash(key) -> expires_at
+        self._lock = threading.Lock()  # sync routes run in the threadpool
+        self.stats = {"allowed": 0, "suppressed": 0, "evictions": 0}
+
+    def allow(self, key: ThrottleKey, now: Optional[float] = None) -> bool:
+        return self.allow_many([key], now)[0]
+
+    def allow_many(self, keys: List[ThrottleKey], now: Optional[float] = None) -> List[bool]:
+        """Checks and claims keys in order; a repeat inside the same batch is suppressed too."""
+        if self.cooldown <= 0: return [True] * len(keys)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return [self._claim(hash(key), now) for key in keys]
+
+    def _claim(self, h: int, now: float) -> bool:
+        expires_at = self._expires.get(h)
+        if expires_at is not None and expires_at > now:
+            self.stats["suppressed"] += 1
+            return False
+        # Re-inserting moves the key to the back, keeping expiry order
+        self._expires.pop(h, None)
+        self._expires[h] = now + self.cooldown
+        if len(self._expires) > self.max_entries:
+            self._expires.popitem(last=False)
+            self.stats["evictions"] += 1
+        self.stats["allowed"] += 1
+        return True
+
+    def _expire(self, now: float):
+        while self._expires:
+            h, expires_at = next(iter(self._expires.items()))
+            if expires_at > now: break
+            del self._expires[h]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self.stats, "size": len(self._expires), "max_entries": self.max_entries, "cooldown_seconds": self.cooldown}
+
+class RedisReplyThrottle(ReplyThrottle):
+    """
+    Shared across workers: SET NX EX per key, pipelined per batch.
+    Falls back to the in-process window if Redis is unreachable.
+    """
+    def __init__(self, cooldown: float, max_entries: int, client: redis.Redis, prefix: str = "jamie_comment_throttle:"):
+        super().__init__(cooldown, max_entries)
+        self.client = client
+        self.prefix = prefix
+        self.stats["redis_errors"] = 0
+
+    def allow_many(self, keys: List[ThrottleKey], now: Optional[float] = None) -> List[bool]:
+        if self.cooldown <= 0: return [True] * len(keys)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                digest = hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=16).hexdigest()
+                pipe.set(self.prefix + digest, 1, nx=True, ex=max(1, int(self.cooldown)))
+            allowed = [bool(ok) for ok in pipe.execute()]
+        except redis.RedisError as e:
+            logger.error(f"Comment Throttle Redis Error: {e}")
+            with self._lock: self.stats["redis_errors"] += 1
+            return super().allow_many(keys, now)
+
+        with self._lock:
+            suppressed = allowed.count(False)
+            self.stats["suppressed"] += suppressed
+            self.stats["allowed"] += len(allowed) - suppressed
+        return allowed
+
+def create_throttle() -> ReplyThrottle:
+    if not Config.COMMENT_THROTTLE_REDIS:
+        return ReplyThrottle(Config.COMMENT_COOLDOWN_SECONDS, Config.COMMENT_THROTTLE_MAX_KEYS)
+    client = redis.Redis(
+        host=Config.REDIS_HOST,
+        port=Config.REDIS_PORT,
+        db=Config.REDIS_DB,
+        password=Config.REDIS_PASSWORD,
+        socket_timeout=1
+    )
+    return RedisReplyThrottle(Config.COMMENT_COOLDOWN_SECONDS, Config.COMMENT_THROTTLE_MAX_KEYS, client)
@@ -6,6 +6,10 @@ load_dotenv()
 
 class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # OpenAI-compatible endpoint (unset = api.openai.com) and per-role model overrides,
+    # e.g. "brain=gpt-4o-mini,voice=gpt-4o-mini,classifier=gpt-4o-mini"
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    LLM_MODEL_MAP = os.getenv("LLM_MODEL_MAP", "")
     # Redis Config
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
@@ -13,4 +17,91 @@ class Config:
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
     
     # Session Expiry (24 hours in seconds)
-    SESSION_TTL = 86400
\ No newline at end of file
+    SESSION_TTL = 86400
+    # Chat history: messages kept in Redis / sent to the brain model per turn
+    HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", 100))
+    HISTORY_CONTEXT_MESSAGES = int(os.getenv("HISTORY_CONTEXT_MESSAGES", 20))
+
+    # Prompt hot reload (seconds between mtime checks, 0 disables)
+    PROMPT_RELOAD_SECONDS = float(os.getenv("PROMPT_RELOAD_SECONDS", 2))
+
+    # Start generating the predicted next reply while extraction / post-link intent classification
+    # runs (discarded if the prediction misses). Predicted states in TEMPLATE_REPLY_STATES are skipped
+    SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "false").lower() == "true"
+
+    # Reply generation: TWO_PASS (brain + voice), BRAIN_ONLY or VOICE_ONLY
+    GENERATION_STRATEGY = os.getenv("GENERATION_STRATEGY", "TWO_PASS")
+    # Per-state overrides, e.g. "STAGE_10_QUAL_AGE=VOICE_ONLY,POST_LINK_FLOW=BRAIN_ONLY"
+    STATE_GENERATION_STRATEGIES = os.getenv("STATE_GENERATION_STRATEGIES", "")
+
+    # Local attribute extraction answers without the LLM at or above this confidence (above 1 disables it)
+    LOCAL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("LOCAL_EXTRACTION_MIN_CONFIDENCE", 0.8))
+
+    # Cache for temperature 0 classifier calls (extraction, post-link intent)
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))
+    LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "false").lower() == "true"
+
+    # Max comments accepted by one /process-comments call
+    COMMENT_BATCH_MAX = int(os.getenv("COMMENT_BATCH_MAX", 50000))
+
+    # One public reply per (platform, post, commenter) per cooldown window (0 disables)
+    COMMENT_COOLDOWN_SECONDS = float(os.getenv("COMMENT_COOLDOWN_SECONDS", 3600))
+    COMMENT_THROTTLE_MAX_KEYS = int(os.getenv("COMMENT_THROTTLE_MAX_KEYS", 500000))
+    COMMENT_THROTTLE_REDIS = os.getenv("COMMENT_THROTTLE_REDIS", "false").lower() == "true"
+
+    # Prompt token budget per model role (estimated tokens) and cap per history message
+    CONTEXT_TOKEN_BUDGETS = os.getenv("CONTEXT_TOKEN_BUDGETS", "brain=4000,voice=3000")
+    CONTEXT_MESSAGE_MAX_TOKENS = int(os.getenv("CONTEXT_MESSAGE_MAX_TOKENS", 300))
+    # Rolling summary: messages older than the last SUMMARY_KEEP_RECENT are folded in,
+    # once at least SUMMARY_MIN_NEW of them are waiting (runs after the reply is sent)
+    SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", 6))
+    SUMMARY_MIN_NEW = int(os.getenv("SUMMARY_MIN_NEW", 10))
+
+    # States answered from pre-voiced variants in <state>_variants.txt instead of the models ("" disables)
+    TEMPLATE_REPLY_STATES = os.getenv(
+        "TEMPLATE_REPLY_STATES",
+        "STAGE_10_QUAL_LOCATION,STAGE_10_QUAL_AGE,STAGE_10_QUAL_RELATIONSHIP,STAGE_10_QUAL_FITNESS,STAGE_10_QUAL_FINANCE"
+    )
+
+    # LLM latency policy per call type (brain, voice, voice_only, classify, summary):
+    # read timeout seconds, retries on timeout/429/5xx, and which types may be hedged
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 3))
+    LLM_TIMEOUTS = os.getenv("LLM_TIMEOUTS", "brain=20,voice=12,voice_only=15,classify=6,summary=30")
+    LLM_RETRIES = os.getenv("LLM_RETRIES", "brain=1,voice=1,voice_only=1,classify=2,summary=2")
+    LLM_HEDGE_PURPOSES = os.getenv("LLM_HEDGE_PURPOSES", "classify,voice")
+    # Hedges allowed per call (0.1 = at most ~10% extra requests) and the earliest a hedge may fire
+    LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", 0.1))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 0.3))
+
+    # Follow-up nudges (followup_<kind>.txt) after the user goes quiet; off by default.
+    # kind=seconds of silence; each kind fires at most once per silence
+    FOLLOWUP_ENABLED = os.getenv("FOLLOWUP_ENABLED", "false").lower() == "true"
+    FOLLOWUP_DELAYS = os.getenv("FOLLOWUP_DELAYS", "10_min=600,24_hour=86400")
+    FOLLOWUP_SKIP_STATES = os.getenv("FOLLOWUP_SKIP_STATES", "END")
+    # Worker: due users claimed per poll, concurrent LLM generations, seconds between polls
+    FOLLOWUP_BATCH = int(os.getenv("FOLLOWUP_BATCH", 100))
+    FOLLOWUP_CONCURRENCY = int(os.getenv("FOLLOWUP_CONCURRENCY", 8))
+    FOLLOWUP_POLL_SECONDS = float(os.getenv("FOLLOWUP_POLL_SECONDS", 5))
+    # Outbox bounds when nudges aren't pulled: seconds a nudge may wait, max nudges waiting
+    FOLLOWUP_OUTBOX_MAX_AGE = int(os.getenv("FOLLOWUP_OUTBOX_MAX_AGE", 3600))
+    FOLLOWUP_OUTBOX_MAX = int(os.getenv("FOLLOWUP_OUTBOX_MAX", 10000))
+
+    # Burst DMs: one turn at a time per user; messages arriving while a turn runs, or within
+    # COALESCE_WINDOW_SECONDS of each other, are answered with one reply.
+    # Off by default (0): a window delays every turn by that much, single messages included
+    COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", 0.0))
+    COALESCE_MAX_WAIT_SECONDS = float(os.getenv("COALESCE_MAX_WAIT_SECONDS", 4.0))
+    COALESCE_MAX_MESSAGES = int(os.getenv("COALESCE_MAX_MESSAGES", 6))
+
+    # Turn recording for replay (benchmarks/replay_turns.py): directory for the gzipped
+    # JSONL files (unset = off) and the share of turns recorded
+    RECORD_TURNS_DIR = os.getenv("RECORD_TURNS_DIR", "")
+    RECORD_SAMPLE_RATE = float(os.getenv("RECORD_SAMPLE_RATE", 1.0))
+
+    # Admission control per worker: turns running at once (0 = unlimited), turns allowed to
+    # queue for a slot (highest lead score first) and how long one may wait before a 503
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 32))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 200))
+    ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 15))
\ No newline at end of file
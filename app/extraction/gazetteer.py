@@ -0,0 +1,79 @@
+# JamieBot/app/extraction/gazetteer.py
+
+# Place names (lowercase, dots removed) -> location region used by qualification.
+# Regions match the LLM extraction prompt: US, CANADA, EU (UK + Europe), OTHER.
+
+US_PLACES = [
+    "usa", "united states", "united states of america", "america", "the states", "states",
+    # States
+    "alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+    "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas", "kentucky",
+    "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi",
+    "missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico",
+    "new york", "north carolina", "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania",
+    "rhode island", "south carolina", "south dakota", "tennessee", "texas", "utah", "vermont",
+    "virginia", "washington", "west virginia", "wisconsin", "wyoming", "puerto rico",
+    # Cities and common shorthands
+    "nyc", "new york city", "brooklyn", "queens", "manhattan", "bronx", "la", "los angeles",
+    "san francisco", "sf", "bay area", "san diego", "san jose", "sacramento", "chicago", "houston",
+    "dallas", "austin", "san antonio", "miami", "orlando", "tampa", "jacksonville", "atlanta",
+    "boston", "philadelphia", "philly", "phoenix", "seattle", "portland", "denver", "las vegas",
+    "vegas", "detroit", "nashville", "charlotte", "raleigh", "minneapolis", "st louis",
+    "kansas city", "baltimore", "dc", "washington dc", "pittsburgh", "cleveland", "columbus",
+    "cincinnati", "indianapolis", "milwaukee", "salt lake city", "new orleans", "honolulu",
+    "west coast", "east coast", "midwest",
+]
+
+# Two-letter state codes only count when written in capitals ("in TX"), and
+# the ones that are also everyday words (IN, OR, ME, OK, HI...) are left out.
+US_STATE_CODES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "ID", "IL", "IA", "KS", "KY",
+    "LA", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC",
+    "ND", "OH", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+]
+
+# Abbreviations that are also everyday words ("tell us more", "bc" = because):
+# like the state codes, they only count when written in capitals ("US", "U.S.", "BC").
+CAPITALS_ONLY_PLACES = {"US": "US", "BC": "CANADA"}
+
+CANADA_PLACES = [
+    "canada", "canadian",
+    "ontario", "quebec", "british columbia", "alberta", "manitoba", "saskatchewan",
+    "nova scotia", "new brunswick", "newfoundland", "prince edward island", "pei", "yukon",
+    "toronto", "vancouver", "montreal", "calgary", "edmonton", "ottawa", "winnipeg", "halifax",
+    "mississauga", "hamilton", "victoria", "gta",
+]
+
+EU_PLACES = [
+    "europe", "eu", "european",
+    "uk", "united kingdom", "england", "britain", "great britain", "scotland", "wales",
+    "northern ireland", "ireland", "germany", "france", "italy", "spain", "portugal",
+    "netherlands", "holland", "belgium", "luxembourg", "switzerland", "austria", "denmark",
+    "sweden", "norway", "finland", "iceland", "poland", "czech republic", "czechia", "slovakia",
+    "hungary", "romania", "bulgaria", "greece", "croatia", "slovenia", "serbia", "estonia",
+    "latvia", "lithuania", "malta", "cyprus",
+    "london", "manchester", "birmingham", "liverpool", "leeds", "glasgow", "edinburgh", "dublin",
+    "berlin", "munich", "hamburg", "frankfurt", "paris", "lyon", "marseille", "rome", "milan",
+    "madrid", "barcelona", "lisbon", "amsterdam", "rotterdam", "brussels", "zurich", "geneva",
+    "vienna", "copenhagen", "stockholm", "oslo", "helsinki", "warsaw", "krakow", "prague",
+    "budapest", "bucharest", "athens",
+]
+
+OTHER_PLACES = [
+    "asia", "africa", "south america", "latin america", "middle east", "oceania",
+    "australia", "new zealand", "mexico", "brazil", "argentina", "colombia", "chile", "peru",
+    "venezuela", "india", "pakistan", "bangladesh", "sri lanka", "nepal", "china", "japan",
+    "korea", "south korea", "philippines", "indonesia", "malaysia", "singapore", "thailand",
+    "vietnam", "nigeria", "ghana", "kenya", "south africa", "egypt", "morocco", "ethiopia",
+    "uae", "dubai", "saudi arabia", "qatar", "israel", "turkey", "russia", "ukraine",
+    "sydney", "melbourne", "brisbane", "perth", "auckland", "mumbai", "delhi", "bangalore",
+    "manila", "lagos", "johannesburg", "cape town", "tokyo", "seoul", "mexico city",
+]
+
+# Names shared by places in different regions (Georgia, Birmingham AL vs UK...)
+AMBIGUOUS_PLACES = {"georgia", "birmingham", "victoria", "hamilton", "perth", "la", "states"}
+
+PLACE_REGIONS = {}
+for _region, _places in (("OTHER", OTHER_PLACES), ("EU", EU_PLACES), ("CANADA", CANADA_PLACES), ("US", US_PLACES)):
+    for _place in _places:
+        PLACE_REGIONS[_place] = _region
@@ -0,0 +1,146 @@
+# JamieBot/app/extraction/local_extractor.py
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+from app.extraction.gazetteer import PLACE_REGIONS, CAPITALS_ONLY_PLACES, US_STATE_CODES, AMBIGUOUS_PLACES
+
+@dataclass(frozen=True)
+class Extraction:
+    value: Optional[str]
+    confidence: float
+
+NO_MATCH = Extraction(None, 0.0)
+
+# --- AGE ---
+UNITS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+WORD_NUMBER = re.compile(
+    rf"\b(?:({'|'.join(TENS)})(?:[\s-]+({'|'.join(UNITS)}))?|({'|'.join(TEENS)}))\b"
+)
+# Numbers followed by a unit are amounts or distances, not ages ("im 30 minutes outside dallas")
+NOT_AN_AGE = r"(?![\d,.]*\s*(?:%|(?:k|grand|dollars|bucks|minutes?|mins?|hours?|hrs?|miles?|mi|km)(?!\w)))"
+AGE_NUMBER = re.compile(r"(?<![\d$£€.,])\b(\d{1,3})\b" + NOT_AN_AGE)
+STATED_AGE = re.compile(r"\b(?:i'?m|i am|im|age|aged)\s+(\d{1,3})\b" + NOT_AN_AGE + r"|\b(\d{1,3})\s*(?:years? old|yrs? old|yo|y/o|yrs)\b")
+APPROXIMATE_AGE = re.compile(r"\b(?:early|mid|late)\b|\d0s\b|\b(?:twenties|thirties|forties|fifties)\b")
+MIN_AGE, MAX_AGE = 13, 100
+
+def _word_numbers(text: str) -> list[int]:
+    values = []
+    for tens, unit, teen in WORD_NUMBER.findall(text):
+        values.append(TEENS[teen] if teen else TENS[tens] + UNITS.get(unit, 0))
+    return values
+
+def extract_age(text: str) -> Extraction:
+    lowered = text.lower()
+    stated = STATED_AGE.search(lowered)
+    if stated:
+        age = int(stated.group(1) or stated.group(2))
+        if MIN_AGE <= age <= MAX_AGE: return Extraction(str(age), 0.95)
+
+    candidates = {int(n) for n in AGE_NUMBER.findall(lowered)} | set(_word_numbers(lowered))
+    ages = {n for n in candidates if MIN_AGE <= n <= MAX_AGE}
+    if len(ages) != 1: return NO_MATCH
+    confidence = 0.6 if APPROXIMATE_AGE.search(lowered) else 0.9
+    return Extraction(str(ages.pop()), confidence)
+
+# --- LOCATION ---
+PLACE_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(p) for p in sorted(PLACE_REGIONS, key=len, reverse=True)) + r")(?!\w)"
+)
+STATE_CODE_PATTERN = re.compile(r"\b(" + "|".join(US_STATE_CODES) + r")\b")
+CAPITALS_PATTERN = re.compile(r"\b(" + "|".join(CAPITALS_ONLY_PLACES) + r")\b")
+
+def extract_location(text: str) -> Extraction:
+    places = PLACE_PATTERN.findall(text.lower().replace(".", ""))
+    regions = {PLACE_REGIONS[p] for p in places}
+    capitals = CAPITALS_PATTERN.findall(text.replace(".", ""))
+    regions.update(CAPITALS_ONLY_PLACES[p] for p in capitals)
+    if STATE_CODE_PATTERN.search(text): regions.add("US")
+    if len(regions) != 1: return NO_MATCH if not regions else Extraction(None, 0.3)
+    confidence = 0.6 if not capitals and all(p in AMBIGUOUS_PLACES for p in places) else 0.9
+    return Extraction(regions.pop(), confidence)
+
+# --- FINANCE ---
+# Longest phrases first so "no savings" wins over "savings"
+LOW_FINANCE = [
+    "paycheck to paycheck", "paycheck", "pay check", "broke", "struggling", "tight", "no savings",
+    "not much saved", "nothing saved", "no money", "not much money", "in debt", "debt", "student",
+    "unemployed", "between jobs", "not comfortable", "not really comfortable", "barely", "low",
+]
+HIGH_FINANCE = [
+    "comfortable", "comfortably", "savings", "saved", "few grand", "couple grand", "invest",
+    "investing", "investments", "well off", "doing well", "doing good", "good money", "stable",
+    "six figures", "financially free", "money in the bank", "high",
+]
+FINANCE_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(LOW_FINANCE + HIGH_FINANCE, key=len, reverse=True)) + r")\b"
+)
+# A HIGH cue after one of these in the same clause ("don't have any savings",
+# "i wouldnt say im comfortable") means LOW
+NEGATORS = {
+    "not", "no", "nope", "zero", "nothing", "never", "without", "barely",
+    "don't", "dont", "isn't", "isnt", "ain't", "aint", "haven't", "havent", "can't", "cant",
+    "wouldn't", "wouldnt", "won't", "wont", "wasn't", "wasnt", "aren't", "arent",
+}
+CLAUSE_BREAK = re.compile(r"[,.;!?]|\bbut\b")
+AMOUNT_PATTERN = re.compile(r"\$?\s?(\d+(?:[.,]\d+)?)\s*(k|grand|thousand)?\b")
+HIGH_AMOUNT = 2000  # "a few grand saved" is the middle answer the LLM prompt treats as HIGH
+
+def _negated(before: str) -> bool:
+    clause = CLAUSE_BREAK.split(before)[-1]
+    return any(token in NEGATORS for token in re.findall(r"[a-z']+", clause))
+
+def extract_finance(text: str) -> Extraction:
+    lowered = text.lower().replace("’", "'")
+    signals = set()
+    for match in FINANCE_PATTERN.finditer(lowered):
+        if match.group(1) in LOW_FINANCE or _negated(lowered[:match.start()]): signals.add("LOW")
+        else: signals.add("HIGH")
+
+    for number, unit in AMOUNT_PATTERN.findall(lowered):
+        if not unit and "$" not in lowered: continue  # bare numbers are too ambiguous (ages, years)
+        amount = float(number.replace(",", "")) * (1000 if unit else 1)
+        signals.add("HIGH" if amount >= HIGH_AMOUNT else "LOW")
+
+    if len(signals) != 1: return NO_MATCH if not signals else Extraction(None, 0.3)
+    return Extraction(signals.pop(), 0.9)
+
+EXTRACTORS = {
+    "age": extract_age,
+    "location": extract_location,
+    "finance": extract_finance,
+}
+
+def extract_local(text: str, attribute_type: str) -> Extraction:
+    extractor = EXTRACTORS.get(attribute_type)
+    return extractor(text) if extractor else NO_MATCH
+
+class ExtractionStats:
+    """
+    Counts, per attribute type, how often the local extractor answered vs. the LLM fallback.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, attribute_type: str, local: bool):
+        with self._lock:
+            row = self._counts.setdefault(attribute_type, {"local": 0, "llm": 0})
+            row["local" if local else "llm"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            report = {}
+            for attribute_type, row in self._counts.items():
+                total = row["local"] + row["llm"]
+                report[attribute_type] = {**row, "local_hit_rate": round(row["local"] / total, 3)}
+            return report
@@ -0,0 +1,104 @@
+# JamieBot/app/keyword_matcher.py
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+def _compile_trie(keywords: Iterable[str], stems: Set[str]) -> str:
+    """
+    Builds a regex trie from the keywords, so shared prefixes are tested once
+    ("text", "texting" -> text(?:ing(?!\\w)|(?!\\w))). Longer continuations come first.
+    Stems end in any word suffix instead of a boundary ("fuck" -> fuck\\w*).
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = keyword
+
+    def render(node: Dict) -> str:
+        branches = []
+        for char in sorted((c for c in node if c), key=lambda c: -_depth(node[c])):
+            branches.append(re.escape(char) + render(node[char]))
+        if "" in node and node[""] in stems:
+            branches.append(r"\w*")
+        elif "" in node:
+            # Word boundary only where the keyword itself ends on a word character ("$" or emoji don't need one)
+            branches.append(r"(?!\w)" if _is_word_char(node[""][-1]) else "")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return render(trie)
+
+def _depth(node: Dict) -> int:
+    return max((1 + _depth(child) for key, child in node.items() if key), default=0)
+
+class KeywordMatcher:
+    """
+    Compiles a keyword table (category -> keywords) once into a single regex with
+    word-boundary semantics: "sex" matches "sex" but not "Essex", "die" not "indie".
+    A trailing "*" makes a keyword a stem that also matches any suffix ("fuck*" -> "fuckin").
+    One scan of the text returns every matched category.
+    """
+    def __init__(self, table: Dict[str, Iterable[str]]):
+        self.categories_by_keyword: Dict[str, Set[str]] = {}
+        self.stems: Set[str] = set()
+        for category, keywords in table.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword.endswith("*"):
+                    keyword = keyword[:-1]
+                    self.stems.add(keyword)
+                self.categories_by_keyword.setdefault(keyword, set()).add(category)
+
+        keywords = list(self.categories_by_keyword)
+        word_start = [k for k in keywords if _is_word_char(k[0])]
+        other_start = [k for k in keywords if not _is_word_char(k[0])]
+        alternatives = []
+        if word_start: alternatives.append(r"(?<!\w)" + _compile_trie(word_start, self.stems))
+        if other_start: alternatives.append(_compile_trie(other_start, self.stems))
+        # Case is folded by lowering the text: re.IGNORECASE roughly doubles the scan time
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+        # Matches don't overlap, so a keyword also implies the categories of the keywords
+        # nested inside it ("no matches" -> "matches")
+        self._implied: Dict[str, Set[str]] = {}
+        for keyword in keywords:
+            implied = set(self.categories_by_keyword[keyword])
+            for other in keywords:
+                if other != keyword and other in keyword and self._contains(keyword, other, other in self.stems):
+                    implied |= self.categories_by_keyword[other]
+            self._implied[keyword] = implied
+
+    @staticmethod
+    def _contains(text: str, keyword: str, stem: bool = False) -> bool:
+        start = r"(?<!\w)" if _is_word_char(keyword[0]) else ""
+        end = r"(?!\w)" if _is_word_char(keyword[-1]) and not stem else ""
+        return re.search(start + re.escape(keyword) + end, text) is not None
+
+    def find(self, text: str) -> List[str]:
+        """
+        Keyword occurrences, left to right, longest first where they start at the same place.
+        A stem is reported as the stem keyword, not the word it matched.
+        """
+        if not text or self.pattern is None: return []
+        return [self._keyword(found) for found in self.pattern.findall(text.lower())]
+
+    def _keyword(self, found: str) -> str:
+        if found in self._implied or not self.stems: return found
+        return max((stem for stem in self.stems if found.startswith(stem)), key=len, default=found)
+
+    def categories(self, text: str) -> Set[str]:
+        matched: Set[str] = set()
+        for keyword in self.find(text):
+            matched |= self._implied.get(keyword, set())
+        return matched
+
+    def matches(self, text: str) -> bool:
+        return bool(text) and self.pattern is not None and self.pattern.search(text.lower()) is not None
+
+    def first(self, text: str, priority: List[str]) -> Optional[str]:
+        """The highest-priority matched category."""
+        matched = self.categories(text)
+        return next((category for category in priority if category in matched), None)
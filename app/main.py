@@ -1,18 +1,42 @@
 # JamieBot/app/main.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from app.api.routes import router
 from app.api.comment_routes import router as comment_router # <--- IMPORT
+from app.api.health_routes import router as health_router
+from app.api.dependencies import init_services, shutdown_services
+
+logger = logging.getLogger(__name__)
+
+async def _warm_up():
+    try:
+        await init_services()
+    except Exception as e:
+        # /healthz keeps answering; /readyz and the DM routes report it (503)
+        logger.error(f"Startup Error: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built per worker, after fork, in the background: the port opens right away
+    warm_up = asyncio.create_task(_warm_up())
+    yield
+    warm_up.cancel()
+    await shutdown_services()
 
 app = FastAPI(
     title="Jamie AI Setter",
     description="State-driven AI Setter chatbot service",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(router)
 app.include_router(comment_router)  # New /process-comment
+app.include_router(health_router)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 @app.get("/")
@@ -0,0 +1,36 @@
+# JamieBot/app/metrics.py
+from prometheus_client import Counter, Gauge, Histogram
+
+# Local steps take microseconds, LLM steps seconds
+STEP_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+TURN_STEP_SECONDS = Histogram(
+    "jamie_turn_step_seconds", "Time spent in each step of a turn (step=turn is the whole turn)",
+    ["step"], buckets=STEP_BUCKETS
+)
+LLM_CALL_SECONDS = Histogram(
+    "jamie_llm_call_seconds", "OpenAI completion latency (streamed calls: until the last chunk)",
+    ["model", "purpose"], buckets=STEP_BUCKETS
+)
+LLM_CALLS = Counter("jamie_llm_calls", "OpenAI completions", ["model", "purpose", "outcome"])
+LLM_TOKENS = Counter("jamie_llm_tokens", "Tokens reported in OpenAI usage", ["model", "kind"])
+REDIS_OP_SECONDS = Histogram("jamie_redis_op_seconds", "RedisService round trips", ["op"], buckets=REDIS_BUCKETS)
+STATE_TRANSITIONS = Counter("jamie_state_transitions", "State machine transitions", ["from_state", "to_state"])
+SUMMARY_UPDATES = Counter("jamie_summary_updates", "Rolling summary refreshes", ["outcome"])
+LLM_RETRIES = Counter("jamie_llm_retries", "OpenAI attempts retried after a timeout / 429 / 5xx", ["purpose"])
+LLM_HEDGES = Counter("jamie_llm_hedges", "Hedged OpenAI calls by which request answered first", ["purpose", "winner"])
+COALESCED_MESSAGES = Counter("jamie_coalesced_messages", "DMs folded into another message's turn (burst coalescing)")
+ADMISSION_DECISIONS = Counter("jamie_admission_decisions", "Turns by admission outcome (admitted, rejected_full, displaced, expired)", ["outcome"])
+ADMISSION_QUEUE_DEPTH = Gauge("jamie_admission_queue_depth", "Turns waiting for an LLM slot")
+ADMISSION_WAIT_SECONDS = Histogram("jamie_admission_wait_seconds", "Time admitted turns waited for an LLM slot", buckets=STEP_BUCKETS)
+FOLLOWUPS = Counter("jamie_followups", "Follow-up nudges by outcome (queued, delivered, stale, skipped, error)", ["kind", "outcome"])
+
+def record_usage(model: str, usage):
+    """Adds a completion's usage block (absent on some streams and fakes) to the token counters."""
+    if usage is None: return
+    LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(model, "completion").inc(usage.completion_tokens or 0)
+    # Prompt tokens served from the provider's prefix cache (subset of "prompt")
+    details = getattr(usage, "prompt_tokens_details", None)
+    LLM_TOKENS.labels(model, "cached").inc(getattr(details, "cached_tokens", 0) or 0)
@@ -1,65 +1,228 @@
 # JamieBot/app/orchestrator.py
-from typing import Dict, Optional, List
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, Optional, List, Tuple
+import asyncio
+import copy
+from contextlib import nullcontext
 import re
+import time
 from app.state_machine.states import ConversationState
 from app.state_machine.transitions import determine_next_state
 from app.services.llm_service import LLMService
+from app.services.prompt_registry import PromptRegistry, POST_LINK_PROMPTS, NO_STATE_PROMPT, state_prompt_file
+from app.services.template_replies import TemplateReplies, parse_template_states
+from app.services.turn_recorder import record_call, isolate_calls, add_calls
+from app.config import Config
 from app.validators.safety_check import validate_safety
 from app.state_machine.exit_rules import normalize_text
 from app.routing.problem_inference import infer_problem_tag, ProblemTag
 from app.routing.product_catalog import get_product_for_problem
 from app.scoring import calculate_score
+from app.speculation import SPECULATIVE_STATES, SpeculationStats, guess_post_link_intent
+from app.metrics import TURN_STEP_SECONDS, STATE_TRANSITIONS
 
 class Orchestrator:
     def __init__(self):
         self.llm_service = LLMService()
+        self.prompts = PromptRegistry()
+        self.prompts.validate()
+        self.prompts.start_watcher(Config.PROMPT_RELOAD_SECONDS)
+        self.templates = TemplateReplies(self.prompts, parse_template_states(Config.TEMPLATE_REPLY_STATES))
+        self._runner: Optional[asyncio.Runner] = None
+        # Template replies render instantly, so a state whose next states are all template-served
+        # has nothing to speculate on; with the default TEMPLATE_REPLY_STATES that is every state
+        self.speculative_states = {
+            state for state, targets in SPECULATIVE_STATES.items()
+            if not all(self.templates.enabled_for(target.value) for target in targets)
+        }
+        self.speculative = Config.SPECULATIVE_GENERATION and bool(self.speculative_states)
+        self.speculation_stats = SpeculationStats()
 
     def _load_prompt(self, filename: str) -> str:
-        try:
-            with open(f"app/prompts/{filename}", "r", encoding="utf-8") as file:
-                return file.read().strip()
-        except FileNotFoundError:
-            return "You are Jamie. Keep the conversation moving."
+        # Served from memory; the registry watcher picks up edits in the background
+        return self.prompts.get(filename)
 
-    def process_message(
+    async def process_message(
         self,
         user_message: str,
         current_state: ConversationState,
         extracted_attributes: Optional[Dict[str, any]] = None,
-        history: List[Dict] = [] 
+        history: List[Dict] = [],
+        admit: Callable[[], AsyncContextManager] = nullcontext
     ) -> Dict[str, any]:
-        
+        """
+        Runs one turn. `admit` wraps reply generation (and a speculative one) only, so turns
+        answered by a template or a fixed reply never wait for, or get refused, an LLM slot.
+        """
+        with TURN_STEP_SECONDS.labels("turn").time():
+            speculation = self._start_speculation(user_message, current_state, extracted_attributes, history, admit)
+            started = time.perf_counter()
+            try:
+                result = await self._plan_turn(user_message, current_state, extracted_attributes)
+            except BaseException:
+                if speculation: self._discard(speculation[1])
+                raise
+            prompt_file = result.pop("prompt_file", None)
+
+            if speculation:
+                predicted_file, task = speculation
+                if prompt_file is not None and prompt_file == predicted_file:
+                    # Generation already ran for the whole planning time
+                    self.speculation_stats.record(current_state, True, time.perf_counter() - started)
+                    with TURN_STEP_SECONDS.labels("generation").time():
+                        result["reply"], calls = await task
+                    add_calls(calls)  # the guess was used, so its calls belong to the turn
+                    return result
+                self._discard(task)
+                self.speculation_stats.record(current_state, False)
+
+            if prompt_file:
+                template = self.templates.render(result["next_state"], result.get("extracted_attributes"))
+                if template is not None:
+                    record_call("template", template, state=result["next_state"])  # random pick, replayed as recorded
+                    result["reply"] = template
+                    return result
+                system_prompt = self._load_prompt("system.txt")
+                state_prompt = self._load_prompt(prompt_file)
+                strategy = self.llm_service.strategy_for(result["next_state"])
+                with TURN_STEP_SECONDS.labels("generation").time():
+                    async with admit():
+                        result["reply"] = await self.llm_service.generate_response(system_prompt, state_prompt, user_message, history, strategy)
+            return result
+
+    def _start_speculation(
+        self,
+        user_message: str,
+        current_state: ConversationState,
+        extracted_attributes: Optional[Dict[str, any]],
+        history: List[Dict],
+        admit: Callable[[], AsyncContextManager]
+    ) -> Optional[Tuple[str, asyncio.Task]]:
+        """
+        Predicts the next state (or post-link intent) before extraction / classification runs
+        and starts generating its reply right away.
+        Returns (predicted prompt file, task), or None when there is nothing worth overlapping.
+        """
+        if not self.speculative or current_state not in self.speculative_states: return None
+        # Safety and off-topic are local checks; don't spend a generation on turns they will short-circuit
+        if not validate_safety(user_message) or self.llm_service.check_off_topic(user_message): return None
+
+        if current_state == ConversationState.POST_LINK_FLOW:
+            intent = guess_post_link_intent(user_message)
+            if intent is None: return None
+            predicted, prompt_file = current_state, POST_LINK_PROMPTS[intent]
+        else:
+            # determine_next_state writes into the attributes, so predict on a copy
+            predicted = determine_next_state(current_state, user_message, copy.deepcopy(extracted_attributes or {}))
+            # Nothing to overlap for template replies, they render instantly
+            if predicted in NO_STATE_PROMPT or self.templates.enabled_for(predicted.value): return None
+            prompt_file = state_prompt_file(predicted)
+
+        system_prompt = self._load_prompt("system.txt")
+        state_prompt = self._load_prompt(prompt_file)
+        strategy = self.llm_service.strategy_for(predicted.value)
+        task = asyncio.create_task(self._speculate(system_prompt, state_prompt, user_message, history, strategy, admit))
+        return prompt_file, task
+
+    async def _speculate(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict], strategy, admit) -> Tuple[str, Optional[List]]:
+        # Recorded apart from the turn: a discarded guess must not end up in the recording
+        calls = isolate_calls()
+        async with admit():
+            reply = await self.llm_service.generate_response(system_prompt, state_prompt, user_message, history, strategy)
+        return reply, calls
+
+    def _discard(self, task: asyncio.Task):
+        task.cancel()
+        # Consume the outcome so a failed speculative call is not reported as "never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def stream_message(
+        self,
+        user_message: str,
+        current_state: ConversationState,
+        extracted_attributes: Optional[Dict[str, any]] = None,
+        history: List[Dict] = [],
+        admit: Callable[[], AsyncContextManager] = nullcontext
+    ) -> AsyncIterator[Tuple[str, any]]:
+        """
+        Same turn as process_message, but yields ("token", text) chunks as the reply is generated,
+        then one ("done", result) with the full reply and the next_state/attributes/score.
+        `admit` is held while the reply streams, as in process_message.
+        """
+        turn_started = time.perf_counter()
+        result = await self._plan_turn(user_message, current_state, extracted_attributes)
+        prompt_file = result.pop("prompt_file", None)
+        if prompt_file:
+            template = self.templates.render(result["next_state"], result.get("extracted_attributes"))
+            if template is not None:
+                result["reply"], prompt_file = template, None
+        if not prompt_file:
+            TURN_STEP_SECONDS.labels("turn").observe(time.perf_counter() - turn_started)
+            yield "token", result["reply"]
+            yield "done", result
+            return
+
+        system_prompt = self._load_prompt("system.txt")
+        state_prompt = self._load_prompt(prompt_file)
+        chunks = []
+        strategy = self.llm_service.strategy_for(result["next_state"])
+        async with admit():
+            started = time.perf_counter()
+            async for chunk in self.llm_service.stream_response(system_prompt, state_prompt, user_message, history, strategy):
+                chunks.append(chunk)
+                yield "token", chunk
+        finished = time.perf_counter()
+        TURN_STEP_SECONDS.labels("generation").observe(finished - started)
+        TURN_STEP_SECONDS.labels("turn").observe(finished - turn_started)
+        result["reply"] = "".join(chunks)
+        yield "done", result
+
+    async def _plan_turn(
+        self,
+        user_message: str,
+        current_state: ConversationState,
+        extracted_attributes: Optional[Dict[str, any]] = None
+    ) -> Dict[str, any]:
+        """
+        Runs safety, extraction, transition and routing.
+        Returns the final result, or one with a "prompt_file" (and no reply) when the reply must be generated.
+        """
         if extracted_attributes is None: extracted_attributes = {}
         
         # 1. SAFETY & OFF-TOPIC
-        if not validate_safety(user_message):
+        with TURN_STEP_SECONDS.labels("safety").time():
+            safe = validate_safety(user_message)
+        if not safe:
             return {"reply": "I’m not the right person for this...", "next_state": current_state.value, "extracted_attributes": extracted_attributes, "progress_score": calculate_score(current_state)}
 
-        off_topic_response = self.llm_service.check_off_topic(user_message)
+        with TURN_STEP_SECONDS.labels("off_topic").time():
+            off_topic_response = self.llm_service.check_off_topic(user_message)
         if off_topic_response:
             return {"reply": off_topic_response + " anyway... back to what we were saying.", "next_state": current_state.value, "extracted_attributes": extracted_attributes, "progress_score": calculate_score(current_state)}
 
         # 2. EXTRACTION
-        if current_state == ConversationState.STAGE_10_QUAL_LOCATION:
-            loc = self.llm_service.extract_attribute(user_message, "location")
-            if loc: extracted_attributes["location_region"] = loc
-        elif current_state == ConversationState.STAGE_10_QUAL_FINANCE:
-            fin = self.llm_service.extract_attribute(user_message, "finance")
-            if fin: extracted_attributes["financial_bucket"] = fin
-        elif current_state == ConversationState.STAGE_10_QUAL_AGE:
-            age_raw = self.llm_service.extract_attribute(user_message, "age")
-            try:
-                age_num = re.search(r'\d+', str(age_raw))
-                if age_num: extracted_attributes["age"] = int(age_num.group())
-            except: extracted_attributes["age"] = 0
+        with TURN_STEP_SECONDS.labels("extraction").time():
+            if current_state == ConversationState.STAGE_10_QUAL_LOCATION:
+                loc = await self.llm_service.extract_attribute(user_message, "location")
+                if loc: extracted_attributes["location_region"] = loc
+            elif current_state == ConversationState.STAGE_10_QUAL_FINANCE:
+                fin = await self.llm_service.extract_attribute(user_message, "finance")
+                if fin: extracted_attributes["financial_bucket"] = fin
+            elif current_state == ConversationState.STAGE_10_QUAL_AGE:
+                age_raw = await self.llm_service.extract_attribute(user_message, "age")
+                try:
+                    age_num = re.search(r'\d+', str(age_raw))
+                    if age_num: extracted_attributes["age"] = int(age_num.group())
+                except: extracted_attributes["age"] = 0
 
-        if "primary_problem" not in extracted_attributes:
-            normalized = normalize_text(user_message)
-            inferred_problem = infer_problem_tag(normalized)
-            if inferred_problem != ProblemTag.GENERAL: extracted_attributes["primary_problem"] = inferred_problem
+            if "primary_problem" not in extracted_attributes:
+                normalized = normalize_text(user_message)
+                inferred_problem = infer_problem_tag(normalized)
+                if inferred_problem != ProblemTag.GENERAL: extracted_attributes["primary_problem"] = inferred_problem
 
         # 3. TRANSITION
-        next_state = determine_next_state(current_state, user_message, extracted_attributes)
+        with TURN_STEP_SECONDS.labels("transition").time():
+            next_state = determine_next_state(current_state, user_message, extracted_attributes)
+        STATE_TRANSITIONS.labels(current_state.value, next_state.value).inc()
         
         state_turn_count = extracted_attributes.get("current_state_turn_count", 0)
         if next_state != current_state: extracted_attributes["current_state_turn_count"] = 0
@@ -108,25 +271,27 @@ class Orchestrator:
 
         # 5. POST LINK HANDLING
         if current_state == ConversationState.POST_LINK_FLOW:
-            intent = self.llm_service.classify_post_link_intent(user_message)
-            prompt_file = "post_link_off_topic.txt"
-            if intent == "BOUGHT": prompt_file = "post_link_bought.txt"
-            elif intent == "QUESTION": prompt_file = "post_link_question.txt"
-            elif intent == "HESITATION": prompt_file = "post_link_hesitation.txt"
-            elif intent == "TECH_ISSUE": prompt_file = "post_link_tech.txt"
-            elif intent == "NEGOTIATION": prompt_file = "post_link_negotiation.txt"
-            
-            system_prompt = self._load_prompt("system.txt")
-            state_prompt = self._load_prompt(prompt_file)
-            response_text = self.llm_service.generate_response(system_prompt, state_prompt, user_message, history)
-            return {"reply": response_text, "next_state": ConversationState.POST_LINK_FLOW.value, "extracted_attributes": extracted_attributes, "progress_score": 100}
+            with TURN_STEP_SECONDS.labels("post_link_intent").time():
+                intent = await self.llm_service.classify_post_link_intent(user_message)
+            prompt_file = POST_LINK_PROMPTS.get(intent, POST_LINK_PROMPTS["OFF_TOPIC"])
+            return {"prompt_file": prompt_file, "next_state": ConversationState.POST_LINK_FLOW.value, "extracted_attributes": extracted_attributes, "progress_score": 100}
 
         # 6. NORMAL GENERATION
         if next_state == ConversationState.END:
             return {"reply": "Got it. I’ll leave things there for now.", "next_state": next_state.value, "progress_score": 100}
 
-        system_prompt = self._load_prompt("system.txt")
-        state_prompt = self._load_prompt(f"{next_state.value.lower()}.txt")
-        response_text = self.llm_service.generate_response(system_prompt, state_prompt, user_message, history)
-        
-        return {"reply": response_text, "next_state": next_state.value, "extracted_attributes": extracted_attributes, "progress_score": calculate_score(next_state)}
\ No newline at end of file
+        return {"prompt_file": state_prompt_file(next_state), "next_state": next_state.value, "extracted_attributes": extracted_attributes, "progress_score": calculate_score(next_state)}
+
+    def process_message_sync(
+        self,
+        user_message: str,
+        current_state: ConversationState,
+        extracted_attributes: Optional[Dict[str, any]] = None,
+        history: List[Dict] = []
+    ) -> Dict[str, any]:
+        """
+        Blocking wrapper for scripts (interactive_chat.py).
+        Reuses one event loop so the async OpenAI client stays bound to it between turns.
+        """
+        if self._runner is None: self._runner = asyncio.Runner()
+        return self._runner.run(self.process_message(user_message, current_state, extracted_attributes, history))
\ No newline at end of file
@@ -1,5 +1,6 @@
 # JamieBot/app/routing/problem_inference.py
 from enum import Enum
+from app.keyword_matcher import KeywordMatcher
 
 class ProblemTag(str, Enum):
     TEXTING = "TEXTING"
@@ -12,87 +13,91 @@ class ProblemTag(str, Enum):
 
 # Keyword Signals
 
+# "*" = stem, any suffix also matches ("match*" -> "matched", "matching")
 TEXTING_KEYWORDS = {
-    "texting",
-    "text",
+    "text*",
     "messages",
     "messaging",
     "what to say",
-    "conversation fizzle",
-    "reply",
+    "conversation fizzle*",
+    "reply*",
+    "replies",
+    "replied",
 }
 
 MATCHES_KEYWORDS = {
-    "matches",
+    "match*",
     "no matches",
-    "dating apps",
+    "dating app*",
     "tinder",
     "hinge",
     "bumble",
-    "profile",
+    "profile*",
     "bio",
+    "bios",
 }
 
 APPROACH_KEYWORDS = {
-    "approach",
-    "approaching",
+    "approach*",
     "in person",
     "real life",
-    "cold approach",
+    "cold approach*",
     "social anxiety",
-    "nervous",
+    "nervous*",
 }
 
 SPARK_KEYWORDS = {
-    "no spark",
-    "friend zone",
+    "no spark*",
+    "friend zone*",
+    "friendzone*",
     "friends",
     "chemistry",
-    "attraction",
+    "attraction*",
     "too nice",
 }
 
 ESCALATION_KEYWORDS = {
-    "escalate",
-    "physical",
-    "kiss",
-    "touch",
-    "sexual",
+    "escalat*",
+    "physical*",
+    "kiss*",
+    "touch*",
+    "sexual*",
     "make a move",
+    "making a move",
 }
 
 CONFIDENCE_KEYWORDS = {
     "confidence",
-    "self doubt",
+    "self doubt*",
     "feel stuck",
-    "insecure",
+    "insecur*",
     "not good enough",
     "lost",
 }
 
+# Priority order when several problems are mentioned
+PROBLEM_PRIORITY = [
+    ProblemTag.TEXTING,
+    ProblemTag.MATCHES,
+    ProblemTag.APPROACH,
+    ProblemTag.SPARK,
+    ProblemTag.ESCALATION,
+    ProblemTag.CONFIDENCE,
+]
+
+PROBLEM_MATCHER = KeywordMatcher({
+    ProblemTag.TEXTING: TEXTING_KEYWORDS,
+    ProblemTag.MATCHES: MATCHES_KEYWORDS,
+    ProblemTag.APPROACH: APPROACH_KEYWORDS,
+    ProblemTag.SPARK: SPARK_KEYWORDS,
+    ProblemTag.ESCALATION: ESCALATION_KEYWORDS,
+    ProblemTag.CONFIDENCE: CONFIDENCE_KEYWORDS,
+})
+
 # Inference Function
 def infer_problem_tag(text: str) -> ProblemTag:
     """
     Infers the primary dating problem from normalized user text.
     Returns exactly ONE ProblemTag.
     """
-    
-    if any(k in text for k in TEXTING_KEYWORDS):
-        return ProblemTag.TEXTING
-    
-    if any(k in text for k in MATCHES_KEYWORDS):
-        return ProblemTag.MATCHES
-    
-    if any(k in text for k in APPROACH_KEYWORDS):
-        return ProblemTag.APPROACH
-    
-    if any(k in text for k in SPARK_KEYWORDS):
-        return ProblemTag.SPARK
-    
-    if any(k in text for k in ESCALATION_KEYWORDS):
-        return ProblemTag.ESCALATION
-    
-    if any(k in text for k in CONFIDENCE_KEYWORDS):
-        return ProblemTag.CONFIDENCE
-    
-    return ProblemTag.GENERAL
+    return PROBLEM_MATCHER.first(text, PROBLEM_PRIORITY) or ProblemTag.GENERAL
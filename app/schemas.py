@@ -11,9 +11,10 @@ class Message(BaseModel):
 class AIRequest(BaseModel):
     user_id: str = Field(..., description="Unique identifier for the user")
     message: str = Field(..., description="Latest message sent by the user")
-    current_state: str = Field(..., description="Current conversation state")
+    current_state: Optional[str] = Field(default=None, description="Current conversation state (omit to use the server-side session)")
     user_attributes: Optional[Dict[str, Any]] = Field(default=None, description="Collected user attributes")
     history: Optional[List[Message]] = Field(default=[])
+    session_version: Optional[int] = Field(default=None, description="Session version from the previous response; rejects stale or reordered requests")
 
 # OUTPUT SCHEMA
 class AIResponse(BaseModel):
@@ -21,6 +22,18 @@ class AIResponse(BaseModel):
     next_state: str
     extracted_attributes: Optional[Dict[str, Any]] = Field(default=None, description="New user attributes")
     progress_score: int = Field(..., description="Lead progress from 0 to 100")
+    session_version: Optional[int] = Field(default=None, description="Server-side session version after this turn")
+    merged: bool = Field(default=False, description="Folded into a later message of the same burst; that request carries the reply, don't send this one")
+
+class FollowUp(BaseModel):
+    user_id: str
+    kind: str = Field(..., description="Follow-up kind, e.g. 10_min or 24_hour")
+    reply: str
+    state: str = Field(..., description="Conversation state the user went quiet in")
+    created_at: float = Field(..., description="Unix time the nudge was generated")
+
+class FollowUpBatch(BaseModel):
+    followups: List[FollowUp]
 
 class Platform(str, Enum):
     INSTAGRAM = "INSTAGRAM"
@@ -0,0 +1,152 @@
+# JamieBot/app/services/admission.py
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Tuple
+from app.metrics import ADMISSION_DECISIONS, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS
+
+class AdmissionRejected(Exception):
+    """The turn was not admitted: 429 when the queue is full, 503 when it waited too long or was displaced."""
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def _percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+class AdmissionController:
+    """
+    Caps the turns doing LLM work in this process at `max_concurrent`.
+    Others wait in a queue of at most `max_queue`, highest priority first (the lead score
+    of the state they are in), FIFO within a priority, each for at most `max_wait` seconds.
+    When the queue is full a new turn either displaces the lowest-priority waiter (which gets
+    a 503) or, if it doesn't outrank it, is refused right away with a 429. Both carry a
+    Retry-After estimated from the recent turn duration and the queue ahead.
+    max_concurrent=0 disables admission control.
+    """
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []  # (-priority, seq, future), lazily pruned
+        self._queued = 0
+        self._seq = itertools.count()
+        self._turn_seconds = 2.0  # EWMA of admitted turn durations, seeds Retry-After
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self.counts = {"admitted": 0, "queued_total": 0, "rejected_full": 0, "displaced": 0, "expired": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        """Holds one of the max_concurrent slots for the block; raises AdmissionRejected instead."""
+        if not self.enabled:
+            yield
+            return
+        await self._acquire(priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._turn_seconds = 0.9 * self._turn_seconds + 0.1 * (time.perf_counter() - started)
+            self._release()
+
+    async def _acquire(self, priority: int):
+        if self.active < self.max_concurrent and not self._queued:
+            self.active += 1
+            self._admitted(0.0)
+            return
+
+        if self._queued >= self.max_queue and not self._displace_below(priority):
+            self.counts["rejected_full"] += 1
+            ADMISSION_DECISIONS.labels("rejected_full").inc()
+            raise AdmissionRejected(429, self.retry_after(), "Too many conversations in flight, retry shortly")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (-priority, next(self._seq), future))
+        self._set_queued(self._queued + 1)
+        self.counts["queued_total"] += 1
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # Caller went away; a slot handed over meanwhile goes to the next waiter
+            if future.done() and not future.cancelled() and future.exception() is None: self._release()
+            else: self._forget(future)
+            raise
+        if not future.done():
+            self._forget(future)
+            self.counts["expired"] += 1
+            ADMISSION_DECISIONS.labels("expired").inc()
+            raise AdmissionRejected(503, self.retry_after(), f"Waited {self.max_wait:.0f}s for LLM capacity")
+        future.result()  # raises AdmissionRejected if displaced
+        self._admitted(time.perf_counter() - queued_at)
+
+    def _admitted(self, waited: float):
+        self.counts["admitted"] += 1
+        self._waits.append(waited)
+        ADMISSION_WAIT_SECONDS.observe(waited)
+        ADMISSION_DECISIONS.labels("admitted").inc()
+
+    def _release(self):
+        # Hand the slot straight to the best waiter (active count unchanged) or free it
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done(): continue
+            self._set_queued(self._queued - 1)
+            future.set_result(None)
+            return
+        self.active -= 1
+
+    def _displace_below(self, priority: int) -> bool:
+        """Rejects the lowest-priority (newest among equals) waiter if `priority` outranks it."""
+        waiting = [entry for entry in self._queue if not entry[2].done()]
+        if not waiting: return False
+        lowest = max(waiting)  # highest -priority = lowest priority; then largest seq = newest
+        if -lowest[0] >= priority: return False
+        lowest[2].set_exception(AdmissionRejected(503, self.retry_after(), "Displaced by a conversation closer to booking"))
+        self._set_queued(self._queued - 1)
+        self.counts["displaced"] += 1
+        ADMISSION_DECISIONS.labels("displaced").inc()
+        return True
+
+    def _forget(self, future: asyncio.Future):
+        if not future.done():
+            future.cancel()
+            self._set_queued(self._queued - 1)
+
+    def _set_queued(self, queued: int):
+        self._queued = queued
+        ADMISSION_QUEUE_DEPTH.set(queued)
+        # Cancelled/displaced entries stay in the heap until popped; rebuild if they pile up
+        if len(self._queue) > 2 * queued + 64:
+            self._queue = [entry for entry in self._queue if not entry[2].done()]
+            heapq.heapify(self._queue)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: recent turn duration x rounds of queue ahead."""
+        rounds = self._queued / max(1, self.max_concurrent) + 1
+        return min(60, max(1, math.ceil(self._turn_seconds * rounds)))
+
+    def snapshot(self) -> Dict[str, float]:
+        ms = lambda pct: round(_percentile(self._waits, pct) * 1000, 1)
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self._queued,
+            **self.counts,
+            "wait_p50_ms": ms(50), "wait_p95_ms": ms(95), "wait_p99_ms": ms(99),
+            "turn_seconds_avg": round(self._turn_seconds, 3),
+            "retry_after_s": self.retry_after(),
+        }
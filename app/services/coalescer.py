@@ -0,0 +1,125 @@
+# JamieBot/app/services/coalescer.py
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.metrics import COALESCED_MESSAGES
+from app.schemas import AIRequest
+
+@dataclass
+class _Burst:
+    requests: List[AIRequest] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    started_at: float = 0.0
+    last_at: float = 0.0
+
+def merge_requests(requests: List[AIRequest]) -> AIRequest:
+    """
+    One request for the whole burst: messages joined in arrival order,
+    state/attributes/version from the latest (the most recent thing the client knew).
+    """
+    if len(requests) == 1: return requests[0]
+    return requests[-1].model_copy(update={"message": "\n".join(r.message for r in requests)})
+
+class TurnCoalescer:
+    """
+    Runs at most one turn per user at a time, and folds the messages of a burst into one turn.
+    A burst stays open while the user's previous turn is still running, then for `window`
+    seconds after its latest message (capped at `max_wait` from its first, and at `max_messages`).
+    The last request of the burst gets the reply; the earlier ones resolve with the same
+    result marked as merged. run_turn is also told whether the turn queued behind another
+    of the user's turns (so explicit-state requests can pick up what that turn saved). Scope is this process: route a user's DMs to one worker.
+    """
+    def __init__(self, window: float, max_wait: float, max_messages: int):
+        self.window = window
+        self.max_wait = max_wait
+        self.max_messages = max_messages
+        self._open: Dict[str, _Burst] = {}
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}  # user -> (lock, holders + waiters)
+        self._tasks = set()
+        self.turns = 0
+        self.messages = 0
+
+    async def submit(self, request: AIRequest, run_turn: Callable[[AIRequest, bool], Awaitable]) -> Tuple[object, bool]:
+        """
+        Returns (turn result, merged): merged=True means a later message of the burst carries the reply.
+        """
+        loop = asyncio.get_running_loop()
+        burst = self._open.get(request.user_id)
+        if burst is None or len(burst.requests) >= self.max_messages:
+            burst = self._open[request.user_id] = _Burst(started_at=loop.time())
+            # A task of its own, so a caller that disconnects doesn't take the others' turn with it
+            task = asyncio.create_task(self._run(request.user_id, burst, run_turn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        future = loop.create_future()
+        burst.requests.append(request)
+        burst.futures.append(future)
+        burst.last_at = loop.time()
+        self.messages += 1
+        result = await asyncio.shield(future)
+        return result, future is not burst.futures[-1]
+
+    async def _run(self, user_id: str, burst: _Burst, run_turn: Callable[[AIRequest, bool], Awaitable]):
+        loop = asyncio.get_running_loop()
+        async with self.serialized(user_id) as user_lock:
+            while len(burst.requests) < self.max_messages:
+                remaining = min(burst.last_at + self.window, burst.started_at + self.max_wait) - loop.time()
+                if remaining <= 0: break
+                await asyncio.sleep(remaining)
+            # Closed: anything from now on starts the next burst (which waits for this turn)
+            if self._open.get(user_id) is burst: del self._open[user_id]
+            self.turns += 1
+            COALESCED_MESSAGES.inc(len(burst.requests) - 1)
+            try:
+                result = await run_turn(merge_requests(burst.requests), user_lock.waited)
+            except BaseException as e:
+                for future in burst.futures:
+                    if not future.done(): future.set_exception(e)
+                if not isinstance(e, Exception): raise
+                return
+            for future in burst.futures:
+                if not future.done(): future.set_result(result)
+
+    def serialized(self, user_id: str) -> "_UserLock":
+        """Per-user lock, also used by the streaming route (which doesn't merge)."""
+        return _UserLock(self, user_id)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "window_seconds": self.window,
+            "messages": self.messages,
+            "turns": self.turns,
+            "messages_per_turn": round(self.messages / self.turns, 3) if self.turns else 0.0,
+            "users_locked": len(self._locks),
+        }
+
+class _UserLock:
+    """Async context manager over the per-user lock; the entry is dropped once nobody holds or waits on it."""
+    def __init__(self, coalescer: TurnCoalescer, user_id: str):
+        self.coalescer = coalescer
+        self.user_id = user_id
+        self.lock: Optional[asyncio.Lock] = None
+        self.waited = False  # another turn of this user held or was waiting for the lock
+
+    async def __aenter__(self):
+        locks = self.coalescer._locks
+        lock, users = locks.get(self.user_id) or (asyncio.Lock(), 0)
+        locks[self.user_id] = (lock, users + 1)
+        self.lock = lock
+        self.waited = users > 0
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._release_entry()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.lock.release()
+        self._release_entry()
+
+    def _release_entry(self):
+        locks = self.coalescer._locks
+        lock, users = locks[self.user_id]
+        if users <= 1: del locks[self.user_id]
+        else: locks[self.user_id] = (lock, users - 1)
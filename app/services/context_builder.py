@@ -0,0 +1,74 @@
+# JamieBot/app/services/context_builder.py
+from typing import Dict, List
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators per chat message
+TRUNCATION_MARK = " …[cut]"
+
+# Token counts here are estimates, not tokenizer output (no tokenizer ships with the app).
+# ASCII runs ~4 chars per token; other scripts and emoji cost far more, so each non-ASCII
+# UTF-8 byte is weighed like 2 ASCII chars (a 4-byte emoji ~ 2 tokens, a CJK char ~ 1.5).
+# ESTIMATE_MARGIN then over-counts by a further 15% so a chat the estimate squeezes
+# just under the budget still fits the model's real limit.
+ESTIMATE_MARGIN = 1.15
+UNITS_PER_TOKEN = 4 / ESTIMATE_MARGIN
+
+def _char_units(char: str) -> int:
+    return 1 if char < "\x80" else 2 * len(char.encode("utf-8"))
+
+def _units(text: str) -> int:
+    if text.isascii(): return len(text)
+    return sum(_char_units(char) for char in text)
+
+def estimate_tokens(text: str) -> int:
+    # Approximate (see above) but deliberately on the high side; cheap enough for every message of every turn
+    return int(_units(text) / UNITS_PER_TOKEN) + 1
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens: return text
+    limit = max(0, int((max_tokens - 1) * UNITS_PER_TOKEN) - _units(TRUNCATION_MARK))
+    if text.isascii(): return text[:limit].rstrip() + TRUNCATION_MARK
+    used = cut = 0
+    for cut, char in enumerate(text):
+        used += _char_units(char)
+        if used > limit: break
+    return text[:cut].rstrip() + TRUNCATION_MARK
+
+def assemble_context(
+    static_prompts: List[str],
+    history: List[Dict[str, str]],
+    final_message: str,
+    budget: int,
+    max_history: int,
+    max_message_tokens: int
+) -> List[Dict[str, str]]:
+    """
+    Builds [static system prompts..., pinned..., recent history..., final user message] within `budget` tokens.
+    The static prompts come first and are never cut, so they form a prefix the provider can cache
+    across users; everything per-user follows. Leading system messages in `history` (the rolling summary) are pinned; the rest is
+    filled newest first, each message capped at `max_message_tokens`, so one long rant
+    can't crowd out the turns around it. The final message is only cut if it alone overflows.
+    """
+    pinned = []
+    for message in history:
+        if message.get("role") != "system": break
+        pinned.append(message)
+    recent = history[len(pinned):][-max_history:] if max_history else []
+
+    head = [{"role": "system", "content": prompt} for prompt in static_prompts] + pinned
+    remaining = budget - sum(message_tokens(m) for m in head)
+    final_budget = max(max_message_tokens, remaining - MESSAGE_OVERHEAD_TOKENS)
+    final = {"role": "user", "content": truncate_to_tokens(final_message, final_budget)}
+    remaining -= message_tokens(final)
+
+    kept = []
+    for message in reversed(recent):
+        content = truncate_to_tokens(message.get("content") or "", max_message_tokens)
+        cost = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if cost > remaining: break
+        kept.append({"role": message["role"], "content": content})
+        remaining -= cost
+    kept.reverse()
+    return head + kept + [final]
@@ -0,0 +1,243 @@
+# JamieBot/app/services/followups.py
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from app.config import Config
+from app.metrics import FOLLOWUPS
+from app.services.llm_service import LLMService
+from app.services.prompt_registry import PromptRegistry
+from app.services.redis_service import RedisService
+from app.services.summarizer import with_summary
+
+logger = logging.getLogger(__name__)
+
+# Redis layout: one sorted set per follow-up kind (user_id -> due time), the user's last
+# activity (compared before publishing, so a reply that arrives mid-generation wins),
+# and an outbox of generated nudges waiting to be pulled (user_id -> ready time, payload).
+QUEUE_KEY = "jamie_followups:{kind}"
+LAST_ACTIVE_KEY = "jamie_last_active:{user_id}"
+OUTBOX_KEY = "jamie_followup_outbox"
+PAYLOADS_KEY = "jamie_followup_payloads"
+
+NO_REPLY_MESSAGE = "[NO REPLY YET]: The user has not answered your last message for {idle}. Write the follow-up."
+
+# Pops up to ARGV[2] members due by ARGV[1]. Atomic, so several workers never claim the same user.
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then redis.call('ZREM', KEYS[1], unpack(due)) end
+return due
+"""
+
+# Queues a generated nudge unless the user was active since it was claimed. The outbox is
+# bounded for when nobody pulls: nudges queued before the cutoff are dropped, then the oldest
+# beyond max size, and both keys expire. Returns 0 (stale) or 1 + the number dropped.
+# KEYS: last active, outbox, payloads. ARGV: claimed activity, now, user_id, payload, cutoff, max size, ttl.
+PUBLISH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+redis.call('HSET', KEYS[3], ARGV[3], ARGV[4])
+local dropped = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[5], 'LIMIT', 0, 1000)
+local over = math.min(1000, redis.call('ZCARD', KEYS[2]) - #dropped - tonumber(ARGV[6]))
+if over > 0 then
+  for _, id in ipairs(redis.call('ZRANGE', KEYS[2], #dropped, #dropped + over - 1)) do dropped[#dropped + 1] = id end
+end
+if #dropped > 0 then
+  redis.call('ZREM', KEYS[2], unpack(dropped))
+  redis.call('HDEL', KEYS[3], unpack(dropped))
+end
+redis.call('EXPIRE', KEYS[2], ARGV[7])
+redis.call('EXPIRE', KEYS[3], ARGV[7])
+return 1 + #dropped
+"""
+
+# Pops the ARGV[1] oldest queued nudges, after dropping those queued before the cutoff ARGV[2].
+# KEYS: outbox, payloads.
+PULL_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[2], 'LIMIT', 0, 1000)
+if #stale > 0 then
+  redis.call('ZREM', KEYS[1], unpack(stale))
+  redis.call('HDEL', KEYS[2], unpack(stale))
+end
+local ids = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #ids == 0 then return {} end
+redis.call('ZREM', KEYS[1], unpack(ids))
+local payloads = redis.call('HMGET', KEYS[2], unpack(ids))
+redis.call('HDEL', KEYS[2], unpack(ids))
+return payloads
+"""
+
+def parse_followup_delays(raw: str) -> List[Tuple[str, int]]:
+    """
+    Parses "10_min=600,24_hour=86400" into [(kind, seconds), ...] ordered by delay.
+    Each kind needs an app/prompts/followup_<kind>.txt.
+    """
+    delays = []
+    for pair in filter(None, (p.strip() for p in raw.split(","))):
+        kind, _, seconds = pair.partition("=")
+        delays.append((kind.strip().lower(), int(seconds)))
+    return sorted(delays, key=lambda d: d[1])
+
+def _idle_text(seconds: float) -> str:
+    return f"{int(seconds // 3600)} hours" if seconds >= 7200 else f"{max(1, int(seconds // 60))} minutes"
+
+class FollowUpScheduler:
+    """
+    Nudges users who went quiet, without ever scanning sessions:
+    - record_activity() (after each saved turn) re-arms every kind at now + delay and
+      cancels whatever was queued or is being generated for that user;
+    - the worker claims due users in batches (ZRANGEBYSCORE + ZREM), generates with at most
+      FOLLOWUP_CONCURRENCY LLM calls in flight and queues the result in the outbox;
+    - the backend pulls the outbox and sends the nudges; pulled nudges join the history.
+    Delivery is at most once: a worker that dies mid-batch drops those nudges.
+    """
+    def __init__(self, llm_service: LLMService, redis_service: RedisService, prompts: PromptRegistry):
+        self.llm_service = llm_service
+        self.redis_service = redis_service
+        self.prompts = prompts
+        self.enabled = Config.FOLLOWUP_ENABLED
+        self.delays = parse_followup_delays(Config.FOLLOWUP_DELAYS)
+        self.skip_states: Set[str] = {s.strip().upper() for s in Config.FOLLOWUP_SKIP_STATES.split(",") if s.strip()}
+        self.batch = Config.FOLLOWUP_BATCH
+        self.poll_seconds = Config.FOLLOWUP_POLL_SECONDS
+        self.concurrency = Config.FOLLOWUP_CONCURRENCY
+        self.outbox_max_age = Config.FOLLOWUP_OUTBOX_MAX_AGE
+        self.outbox_max = Config.FOLLOWUP_OUTBOX_MAX
+        self.outbox_dropped = 0  # nudges this process dropped from a full or stale outbox
+        if self.enabled: prompts.validate([f"followup_{kind}.txt" for kind, _ in self.delays])
+        # The conversation has to outlive the last nudge (sessions expire after SESSION_TTL otherwise)
+        self.keep_alive = max([Config.SESSION_TTL] + [delay + 3600 for _, delay in self.delays])
+        client = redis_service.client
+        self._claim = client.register_script(CLAIM_SCRIPT)
+        self._publish = client.register_script(PUBLISH_SCRIPT)
+        self._pull = client.register_script(PULL_SCRIPT)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self):
+        return self.redis_service.client
+
+    async def record_activity(self, user_id: str, now: Optional[float] = None):
+        """
+        Re-arms the follow-ups for this user; O(log n) per kind.
+        Never fails the turn: the reply is already saved when this runs.
+        """
+        if not self.enabled: return
+        now = now or time.time()
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.set(LAST_ACTIVE_KEY.format(user_id=user_id), f"{now:.6f}", ex=self.keep_alive)
+                for kind, delay in self.delays:
+                    pipe.zadd(QUEUE_KEY.format(kind=kind), {user_id: now + delay})
+                pipe.zrem(OUTBOX_KEY, user_id)
+                pipe.hdel(PAYLOADS_KEY, user_id)
+                for key in (f"jamie_session:{user_id}", f"jamie_chat:{user_id}", f"jamie_summary:{user_id}"):
+                    pipe.expire(key, self.keep_alive)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Follow-up Schedule Error: {e}")
+
+    async def run_once(self, now: Optional[float] = None) -> int:
+        """
+        Claims and handles one batch per kind that is due. Returns the number of users claimed.
+        """
+        now = now or time.time()
+        claimed = 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        for index, (kind, _) in enumerate(self.delays):
+            user_ids = await self._claim(keys=[QUEUE_KEY.format(kind=kind)], args=[now, self.batch], client=self.client)
+            if not user_ids: continue
+            claimed += len(user_ids)
+            activities = await self.client.mget([LAST_ACTIVE_KEY.format(user_id=u) for u in user_ids])
+            later = [delay for _, delay in self.delays[index + 1:]]
+            await asyncio.gather(*[
+                self._handle(kind, user_id, activity, now, later, semaphore)
+                for user_id, activity in zip(user_ids, activities)
+            ])
+        return claimed
+
+    async def _handle(self, kind: str, user_id: str, activity: Optional[str], now: float, later: List[int], semaphore: asyncio.Semaphore):
+        if activity is None:
+            FOLLOWUPS.labels(kind, "stale").inc()  # conversation expired or was cleared
+            return
+        idle = now - float(activity)
+        if any(idle >= delay for delay in later):
+            FOLLOWUPS.labels(kind, "skipped").inc()  # claimed late; the next nudge replaces it
+            return
+
+        async with semaphore:
+            try:
+                session, history = await self.redis_service.load_session(user_id, limit=Config.HISTORY_CONTEXT_MESSAGES)
+                if session.state is None or session.state in self.skip_states:
+                    FOLLOWUPS.labels(kind, "skipped").inc()
+                    return
+                state_prompt = f"{self.prompts.get(f'followup_{kind}.txt')}\n\n[FUNNEL STEP THE USER IS ON]: {session.state}"
+                reply = await self.llm_service.generate_response(
+                    self.prompts.get("system.txt"),
+                    state_prompt,
+                    NO_REPLY_MESSAGE.format(idle=_idle_text(idle)),
+                    with_summary(session, history)
+                )
+                payload = json.dumps({"user_id": user_id, "kind": kind, "reply": reply, "state": session.state, "created_at": now})
+                published = await self._publish(
+                    keys=[LAST_ACTIVE_KEY.format(user_id=user_id), OUTBOX_KEY, PAYLOADS_KEY],
+                    args=[activity, now, user_id, payload, now - self.outbox_max_age, self.outbox_max, self.outbox_max_age],
+                    client=self.client
+                )
+                FOLLOWUPS.labels(kind, "queued" if published else "stale").inc()
+                if published > 1:
+                    self.outbox_dropped += published - 1
+                    logger.warning(f"Follow-up outbox full or not pulled, dropped {published - 1} nudges")
+            except Exception as e:
+                FOLLOWUPS.labels(kind, "error").inc()
+                logger.error(f"Follow-up Error ({user_id}): {e}")
+
+    async def pull(self, limit: int = 50) -> List[Dict]:
+        """
+        Hands out up to `limit` generated nudges, oldest first, and records them in each history.
+        A pulled nudge is considered sent.
+        """
+        raw = await self._pull(keys=[OUTBOX_KEY, PAYLOADS_KEY], args=[limit, time.time() - self.outbox_max_age], client=self.client)
+        followups = [json.loads(p) for p in raw if p]
+        if followups:
+            await self.redis_service.add_followups([(f["user_id"], f["reply"]) for f in followups], ttl=self.keep_alive)
+        for f in followups:
+            FOLLOWUPS.labels(f["kind"], "delivered").inc()
+        return followups
+
+    async def snapshot(self) -> Dict[str, int]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for kind, _ in self.delays:
+                pipe.zcard(QUEUE_KEY.format(kind=kind))
+            pipe.zcard(OUTBOX_KEY)
+            counts = await pipe.execute()
+        stats = {f"scheduled_{kind}": count for (kind, _), count in zip(self.delays, counts)}
+        stats["outbox"] = counts[-1]
+        stats["outbox_dropped"] = self.outbox_dropped
+        return {"enabled": self.enabled, **stats}
+
+    # --- WORKER ---
+    def start(self):
+        if not self.enabled or self._task is not None: return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None: return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Follow-up Worker Error: {e}")
+                claimed = 0
+            # A full batch means more are already due: go again without sleeping
+            if claimed < self.batch:
+                await asyncio.sleep(self.poll_seconds)
@@ -0,0 +1,175 @@
+# JamieBot/app/services/llm_policy.py
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from app.config import Config
+from app.metrics import LLM_HEDGES, LLM_RETRIES
+
+T = TypeVar("T")
+
+# Worth another attempt; 4xx other than 429 are not
+RETRYABLE = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+MIN_SAMPLES_TO_HEDGE = 20  # no hedging until the p95 means something
+HEDGE_BURST = 5.0  # hedge tokens that can pile up while traffic is quiet
+
+def parse_purpose_map(raw: str) -> Dict[str, str]:
+    """Parses "brain=20,classify=6" into a purpose -> value map."""
+    values = {}
+    for pair in filter(None, (p.strip() for p in raw.split(","))):
+        purpose, _, value = pair.partition("=")
+        values[purpose.strip().lower()] = value.strip()
+    return values
+
+@dataclass(frozen=True)
+class CallPolicy:
+    timeout: float          # read timeout per attempt (seconds)
+    retries: int            # extra attempts on RETRYABLE errors
+    hedge: bool             # fire a duplicate after the observed p95
+
+def load_policies() -> Dict[str, CallPolicy]:
+    timeouts = parse_purpose_map(Config.LLM_TIMEOUTS)
+    retries = parse_purpose_map(Config.LLM_RETRIES)
+    hedged = {p.strip().lower() for p in Config.LLM_HEDGE_PURPOSES.split(",") if p.strip()}
+    return {
+        purpose: CallPolicy(float(timeouts.get(purpose, 30)), int(retries.get(purpose, 1)), purpose in hedged)
+        for purpose in set(timeouts) | set(retries) | hedged
+    }
+
+def _percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+class PurposeStats:
+    """Recent latencies of one call type: what the primary request took vs. what the caller waited."""
+    def __init__(self, window: int = 1000):
+        self.primary: Deque[float] = deque(maxlen=window)
+        self.effective: Deque[float] = deque(maxlen=window)
+        self.counts = {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+        self.hedge_tokens = HEDGE_BURST
+        self._p95 = 0.0
+        self._p95_at = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        if len(self.primary) < MIN_SAMPLES_TO_HEDGE: return None
+        # Re-sorting the window on every call is wasteful; refresh every 20 samples
+        if self.counts["calls"] - self._p95_at >= 20 or not self._p95:
+            self._p95, self._p95_at = _percentile(self.primary, 95), self.counts["calls"]
+        return self._p95
+
+    def snapshot(self) -> Dict[str, float]:
+        ms = lambda values, pct: round(_percentile(values, pct) * 1000, 1)
+        return {
+            **self.counts,
+            "primary_p50_ms": ms(self.primary, 50), "primary_p95_ms": ms(self.primary, 95), "primary_p99_ms": ms(self.primary, 99),
+            "effective_p50_ms": ms(self.effective, 50), "effective_p95_ms": ms(self.effective, 95), "effective_p99_ms": ms(self.effective, 99),
+        }
+
+class LatencyPolicy:
+    """
+    Per call type: timeouts, retries with jittered exponential backoff (tenacity) and
+    hedging: if the first request is slower than the recent p95, a duplicate is sent and
+    whichever answers first wins. Hedges are paid from a token bucket that refills by
+    LLM_HEDGE_MAX_RATIO per call, so they stay a bounded share of traffic.
+    When the hedge wins, the primary is left to finish (up to its timeout) so
+    "primary_*" latencies show the tail the caller would have seen without hedging.
+    """
+    def __init__(self, policies: Optional[Dict[str, CallPolicy]] = None):
+        self.policies = policies if policies is not None else load_policies()
+        self.default = CallPolicy(timeout=30.0, retries=1, hedge=False)
+        self.connect_timeout = Config.LLM_CONNECT_TIMEOUT
+        self.hedge_ratio = Config.LLM_HEDGE_MAX_RATIO
+        self.min_hedge_delay = Config.LLM_HEDGE_MIN_DELAY
+        self._stats: Dict[str, PurposeStats] = {}
+        self._lock = threading.Lock()
+        self._background = set()
+
+    def stats_for(self, purpose: str) -> PurposeStats:
+        with self._lock:
+            return self._stats.setdefault(purpose, PurposeStats())
+
+    def timeout_for(self, purpose: str) -> httpx.Timeout:
+        return httpx.Timeout(self.policies.get(purpose, self.default).timeout, connect=self.connect_timeout)
+
+    async def call(self, purpose: str, request: Callable[[], Awaitable[T]], hedgeable: bool = True) -> T:
+        policy = self.policies.get(purpose, self.default)
+        stats = self.stats_for(purpose)
+        stats.counts["calls"] += 1
+        stats.hedge_tokens = min(HEDGE_BURST, stats.hedge_tokens + self.hedge_ratio)
+        started = time.perf_counter()
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(policy.retries + 1),
+            wait=wait_random_exponential(multiplier=0.25, max=4),
+            retry=retry_if_exception_type(RETRYABLE),
+            before_sleep=lambda state: self._on_retry(purpose, stats, state),
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                if policy.hedge and hedgeable:
+                    result = await self._hedged(purpose, stats, request)
+                else:
+                    result = await self._timed(stats, request)
+        stats.effective.append(time.perf_counter() - started)
+        return result
+
+    def _on_retry(self, purpose: str, stats: PurposeStats, state):
+        stats.counts["retries"] += 1
+        if isinstance(state.outcome.exception(), APITimeoutError): stats.counts["timeouts"] += 1
+        LLM_RETRIES.labels(purpose).inc()
+
+    async def _timed(self, stats: PurposeStats, request: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await request()
+        stats.primary.append(time.perf_counter() - started)
+        return result
+
+    async def _hedged(self, purpose: str, stats: PurposeStats, request: Callable[[], Awaitable[T]]) -> T:
+        delay = stats.hedge_delay()
+        primary = asyncio.ensure_future(self._timed(stats, request))
+        if delay is None:
+            return await primary
+
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=max(delay, self.min_hedge_delay))
+            if done or stats.hedge_tokens < 1:
+                return await primary
+
+            stats.hedge_tokens -= 1
+            stats.counts["hedges"] += 1
+            hedge = asyncio.ensure_future(request())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None: continue
+                    if task is hedge:
+                        stats.counts["hedge_wins"] += 1
+                        LLM_HEDGES.labels(purpose, "hedge").inc()
+                        self._let_finish(primary)
+                    else:
+                        LLM_HEDGES.labels(purpose, "primary").inc()
+                        hedge.cancel()
+                    return task.result()
+            # Both failed: surface the primary's error to the retry loop
+            return primary.result()
+        except asyncio.CancelledError:
+            primary.cancel()
+            if hedge is not None: hedge.cancel()
+            raise
+
+    def _let_finish(self, task: asyncio.Future):
+        # Still running only to record its latency; drop its result or error
+        self._background.add(task)
+        task.add_done_callback(lambda t: (self._background.discard(t), t.cancelled() or t.exception()))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {purpose: stats.snapshot() for purpose, stats in self._stats.items()}
@@ -1,87 +1,354 @@
 # JamieBot/app/services/llm_service.py
+import asyncio
+import hashlib
 import os
 import logging
 import re
-from typing import List, Dict
-from openai import OpenAI
+import time
+from enum import Enum
+from typing import AsyncIterator, List, Dict, Optional
+from openai import AsyncOpenAI
 from app.config import Config
+from app.validators.length_check import split_sentences
+from app.extraction.local_extractor import extract_local, ExtractionStats
+from app.services.response_cache import ResponseCache, cache_key
+from app.services.redis_service import create_client
+from app.services.context_builder import assemble_context, truncate_to_tokens
+from app.services.llm_policy import LatencyPolicy
+from app.services.turn_recorder import record_call
+from app.keyword_matcher import KeywordMatcher
+from app.metrics import LLM_CALL_SECONDS, LLM_CALLS, record_usage
 
 logger = logging.getLogger(__name__)
 
+OPENERS = ("hey there", "hi there", "hey", "hi", "got it", "sure thing", "makes sense", "totally", "that makes sense")
+OPENER_PATTERN = re.compile(rf'^({"|".join(OPENERS)})[\.,\s]+(\.\.\.)?\s*', flags=re.IGNORECASE)
+OPENER_WINDOW = 48  # upper bound on chars buffered while deciding whether the reply starts with an opener
+TRAILING_HOLD = re.compile(r'\s+-?$')  # could still become " - " or be stripped
+STYLE_DASHES = re.compile(r'\s*[—–]\s*|\s+-\s+')
+
+OFF_TOPIC_MATCHER = KeywordMatcher({
+    "IDENTITY": [
+        "are you real", "are you really jamie", "is this a bot",
+        "is this ai", "are you a bot", "are u a bot",
+        "who is this", "who are you", "who are u", "who r u",
+        "is this jamie", "who am i speaking", "am i speaking to jamie"
+    ],
+    "DEFENSIVE": ["why are you asking", "why do you need to know"],
+})
+
+class GenerationStrategy(str, Enum):
+    TWO_PASS = "TWO_PASS"        # brain drafts, fine-tuned voice model rewrites (2 completions)
+    BRAIN_ONLY = "BRAIN_ONLY"    # brain drafts, style rules applied locally (1 completion)
+    VOICE_ONLY = "VOICE_ONLY"    # voice model answers the full state prompt itself (1 completion)
+
+def parse_state_strategies(raw: str) -> Dict[str, GenerationStrategy]:
+    """
+    Parses "STAGE_1_PATTERN=VOICE_ONLY,STAGE_2_TIME_COST=BRAIN_ONLY" into a state -> strategy map.
+    """
+    strategies = {}
+    for pair in filter(None, (p.strip() for p in raw.split(","))):
+        state, _, strategy = pair.partition("=")
+        strategies[state.strip().upper()] = GenerationStrategy(strategy.strip().upper())
+    return strategies
+
+MODEL_ROLES = ("brain", "voice", "classifier")
+
+def parse_model_map(raw: str) -> Dict[str, str]:
+    """
+    Parses "brain=gpt-4o-mini,voice=mock-voice" into a role -> model name map (names keep their case).
+    """
+    models = {}
+    for pair in filter(None, (p.strip() for p in raw.split(","))):
+        role, _, model = pair.partition("=")
+        role = role.strip().lower()
+        if role not in MODEL_ROLES: raise ValueError(f"Unknown model role '{role}' (expected one of {', '.join(MODEL_ROLES)})")
+        models[role] = model.strip()
+    return models
+
+def parse_token_budgets(raw: str) -> Dict[str, int]:
+    """Parses "brain=4000,voice=3000" into a role -> prompt token budget map."""
+    return {role: int(budget) for role, budget in parse_model_map(raw).items()}
+
+SUMMARY_PROMPT = (
+    "You keep notes on a DM conversation between Jamie's assistant and a man looking for dating help.\n"
+    "Update the notes with the new messages. Keep every fact that matters for coaching: his main problem, "
+    "his goal, how long it has been going on, what he tried, location, age, relationship goal, fitness, "
+    "finances, objections and anything he asked us to remember. Drop greetings and small talk.\n"
+    "Plain sentences, no lists, at most 80 words. Return only the updated notes."
+)
+
+# Static instructions of the voice rewrite; kept as its own system message so only the draft varies
+STYLE_PROMPT = (
+    "Rewrite the following message as Jamie.\n"
+    "Persona: Supportive older sister. Casual American vibe.\n"
+    "STRICT FORMATTING RULES:\n"
+    "1. NO DASHES (—) or hyphens (-). Use '...' or commas instead.\n"
+    "2. Make it sound like a real text message.\n"
+    "3. Do not answer questions not present in the draft.\n"
+    "4. Do not add philosophical thoughts.\n"
+    "5. End with the exact same question found in the draft (if any)."
+)
+
+def prefix_cache_key(*static_parts: str) -> str:
+    """Same static prefix -> same key, so the provider routes those requests to the same prompt cache."""
+    digest = hashlib.sha256("\x00".join(static_parts).encode("utf-8")).hexdigest()
+    return f"jamie-{digest[:16]}"
+
+class StreamingCleaner:
+    """
+    Incremental version of LLMService._clean_formatting for streamed replies.
+    Holds back only what the next chunk could still change (the opener window, a trailing " -" or whitespace).
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+        self._pending_lower = True
+
+    def feed(self, delta: str) -> str:
+        self._buffer += delta
+        if not self._started:
+            if not self._opener_settled(): return ""
+            self._start()
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        if not self._started: self._start()
+        return self._drain(final=True)
+
+    def _opener_settled(self) -> bool:
+        # Settled once the next chunk can no longer change what OPENER_PATTERN strips
+        head = self._buffer.lower()
+        if len(head) >= OPENER_WINDOW: return True
+        if any(opener.startswith(head) for opener in OPENERS): return False
+        match = OPENER_PATTERN.match(self._buffer)
+        return not match or match.end() < len(self._buffer)
+
+    def _start(self):
+        self._buffer = OPENER_PATTERN.sub('', self._buffer).lstrip()
+        self._started = True
+
+    def _drain(self, final: bool) -> str:
+        text = self._buffer.replace("—", ", ").replace(" - ", ", ")
+        if final:
+            emit, self._buffer = text.rstrip(), ""
+        else:
+            hold = TRAILING_HOLD.search(text)
+            cut = hold.start() if hold else len(text)
+            emit, self._buffer = text[:cut], text[cut:]
+        if emit and self._pending_lower:
+            emit = emit[0].lower() + emit[1:]
+            self._pending_lower = False
+        return emit
+
 class LLMService:
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set")
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        # OPENAI_BASE_URL points the client at any OpenAI-compatible server (e.g. benchmarks/mock_openai.py)
+        # Retries are done by latency_policy (per call type), not by the client
+        self.client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL, max_retries=0)
+        self.latency_policy = LatencyPolicy()
         
-        self.brain_model = "gpt-5.2" 
-        self.voice_model = (
-            "ft:gpt-4o-mini-2024-07-18:jamie-date:human-chat:CIbbXDDz:ckpt-step-34"
+        models = parse_model_map(Config.LLM_MODEL_MAP)
+        self.brain_model = models.get("brain", "gpt-5.2")
+        self.voice_model = models.get(
+            "voice", "ft:gpt-4o-mini-2024-07-18:jamie-date:human-chat:CIbbXDDz:ckpt-step-34"
         )
+        self.classifier_model = models.get("classifier", "gpt-4o-mini")
         self.brain_temperature = 0.2
         self.voice_temperature = 0.5
         self.max_output_tokens = 150
-        self.use_voice_model = True
+        self.token_budgets = parse_token_budgets(Config.CONTEXT_TOKEN_BUDGETS)
+        self.default_strategy = GenerationStrategy(Config.GENERATION_STRATEGY)
+        self.state_strategies = parse_state_strategies(Config.STATE_GENERATION_STRATEGIES)
+        self.local_extraction_min_confidence = Config.LOCAL_EXTRACTION_MIN_CONFIDENCE
+        self.extraction_stats = ExtractionStats()
+        self.classifier_cache = ResponseCache(
+            max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+            ttl=Config.LLM_CACHE_TTL,
+            redis_client=create_client() if Config.LLM_CACHE_REDIS else None
+        )
+    
+    def strategy_for(self, state: Optional[str]) -> GenerationStrategy:
+        return self.state_strategies.get(state, self.default_strategy)
     
     def _clean_formatting(self, text: str) -> str:
         if not text: return ""
-        text = re.sub(r'^(hey there|hi there|hey|hi|got it|sure thing|makes sense|totally|that makes sense)[\.,\s]+(\.\.\.)?\s*', '', text, flags=re.IGNORECASE)
+        text = OPENER_PATTERN.sub('', text)
         text = text.replace("—", ", ").replace(" - ", ", ")
         if text and len(text) > 0:
             text = text[0].lower() + text[1:]
         return text.strip()
     
+    def _apply_style_rules(self, text: str) -> str:
+        """
+        Local stand-in for the voice rewrite: no dashes, at most two sentences,
+        and only one question, which stays at the end.
+        """
+        text = STYLE_DASHES.sub(", ", text)
+        sentences = split_sentences(text)
+        questions = [s for s in sentences if s.endswith("?")]
+        if questions:
+            statements = [s for s in sentences if not s.endswith("?")]
+            sentences = statements[:1] + questions[-1:]
+        return self._clean_formatting(" ".join(sentences[:2]))
+    
     def _extract_text(self, response) -> str:
         return response.choices[0].message.content.strip()
     
-    def _prepare_response(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict]) -> str:
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # ✅ FIX: Increased context window from 10 to 20
-        # This solves the "Amnesia" where it forgets the user's goal
-        messages.extend(history[-20:]) 
-        
-        final_prompt = f"{state_prompt}\n\n[CURRENT USER MESSAGE]:\n{user_message}"
-        messages.append({"role": "user", "content": final_prompt})
+    async def _classify(self, system_prompt: str, text: str) -> str:
+        """
+        Temperature 0 classifier call, served from the content-addressed cache when possible.
+        """
+        key = cache_key(self.classifier_model, system_prompt, text)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
+        cached = await self.classifier_cache.get(key)
+        if cached is not None:
+            record_call("classify", cached, self.classifier_model, messages, cached=True)
+            return cached
+        response = await self._complete(
+            "classify",
+            model=self.classifier_model, # Fast model is fine here
+            temperature=0.0,
+            messages=messages
+        )
+        result = self._extract_text(response)
+        await self.classifier_cache.set(key, result)
+        return result
+    
+    async def _complete(self, purpose: str, **kwargs):
+        """Every non-streamed completion goes through here so it is timed and its tokens counted."""
+        model = kwargs["model"]
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            with LLM_CALL_SECONDS.labels(model, purpose).time():
+                response = await self.latency_policy.call(purpose, lambda: self.client.chat.completions.create(
+                    timeout=self.latency_policy.timeout_for(purpose), **kwargs
+                ))
+            outcome = "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"  # discarded speculation
+            raise
+        finally:
+            LLM_CALLS.labels(model, purpose, outcome).inc()
+        usage = getattr(response, "usage", None)
+        record_usage(model, usage)
+        record_call(
+            purpose, response.choices[0].message.content, model, kwargs["messages"],
+            ms=round((time.perf_counter() - started) * 1000, 1),
+            usage=usage and {"prompt": usage.prompt_tokens, "completion": usage.completion_tokens}
+        )
+        return response
+    
+    async def _stream_text(self, purpose: str, **kwargs) -> AsyncIterator[str]:
+        model = kwargs["model"]
+        outcome = "error"
+        try:
+            with LLM_CALL_SECONDS.labels(model, purpose).time():
+                # include_usage adds a final chunk with no choices that carries the token counts
+                # Retried only until the stream opens; never hedged (it would double the tokens streamed)
+                stream = await self.latency_policy.call(purpose, lambda: self.client.chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, timeout=self.latency_policy.timeout_for(purpose), **kwargs
+                ), hedgeable=False)
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    record_usage(model, getattr(chunk, "usage", None))
+            outcome = "ok"
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"  # client went away mid-stream
+            raise
+        finally:
+            LLM_CALLS.labels(model, purpose, outcome).inc()
+    
+    def _brain_request(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict], voice: bool = False) -> Dict:
+        # Static first (system + state instructions, shared by everyone in this state),
+        # then the summary, up to 20 recent messages (the "amnesia" fix) and the new message,
+        # within the model's token budget
+        messages = assemble_context(
+            [system_prompt, state_prompt],
+            history,
+            f"[CURRENT USER MESSAGE]:\n{user_message}",
+            budget=self.token_budgets.get("voice" if voice else "brain", 4000),
+            max_history=Config.HISTORY_CONTEXT_MESSAGES,
+            max_message_tokens=Config.CONTEXT_MESSAGE_MAX_TOKENS
+        )
         
-        response = self.client.chat.completions.create(
-            model=self.brain_model,
-            temperature=self.brain_temperature,
+        return dict(
+            model=self.voice_model if voice else self.brain_model,
+            temperature=self.voice_temperature if voice else self.brain_temperature,
             max_completion_tokens=self.max_output_tokens,
-            messages=messages
+            messages=messages,
+            prompt_cache_key=prefix_cache_key(system_prompt, state_prompt)
         )
+    
+    async def _prepare_response(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict]) -> str:
+        response = await self._complete("brain", **self._brain_request(system_prompt, state_prompt, user_message, history))
         return self._extract_text(response)
     
-    def _rewrite_human_tone(self, draft_text: str) -> str:
-        style_prompt = (
-            "Rewrite the following message as Jamie.\n"
-            "Persona: Supportive older sister. Casual American vibe.\n"
-            "STRICT FORMATTING RULES:\n"
-            "1. NO DASHES (—) or hyphens (-). Use '...' or commas instead.\n"
-            "2. Make it sound like a real text message.\n"
-            "3. Do not answer questions not present in the draft.\n"
-            "4. Do not add philosophical thoughts.\n"
-            "5. End with the exact same question found in the draft (if any).\n\n"
-            f"Draft to rewrite: \"{draft_text}\""
-        )
-        response = self.client.chat.completions.create(
+    def _voice_request(self, draft_text: str) -> Dict:
+        return dict(
             model=self.voice_model,
             temperature=self.voice_temperature,
             max_completion_tokens=self.max_output_tokens,
-            messages=[{"role": "user", "content": style_prompt}]
+            messages=[
+                {"role": "system", "content": STYLE_PROMPT},
+                {"role": "user", "content": f"Draft to rewrite: \"{draft_text}\""}
+            ],
+            prompt_cache_key=prefix_cache_key(STYLE_PROMPT)
         )
+    
+    async def _rewrite_human_tone(self, draft_text: str) -> str:
+        response = await self._complete("voice", **self._voice_request(draft_text))
         return self._extract_text(response)
     
     # --- PUBLIC API ---
-    def generate_response(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict]) -> str:
-        draft = self._prepare_response(system_prompt, state_prompt, user_message, history)
+    async def generate_response(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict], strategy: Optional[GenerationStrategy] = None) -> str:
+        strategy = strategy or self.default_strategy
+        if strategy == GenerationStrategy.VOICE_ONLY:
+            response = await self._complete("voice_only", **self._brain_request(system_prompt, state_prompt, user_message, history, voice=True))
+            return self._clean_formatting(self._extract_text(response)) or "Hmm, tell me more."
+
+        draft = await self._prepare_response(system_prompt, state_prompt, user_message, history)
         if not draft: return "Hmm, tell me more."
-        if self.use_voice_model:
-            draft = self._rewrite_human_tone(draft)
+        if strategy == GenerationStrategy.BRAIN_ONLY:
+            return self._apply_style_rules(draft)
+        draft = await self._rewrite_human_tone(draft)
         final_text = self._clean_formatting(draft)
         return final_text
     
-    def extract_attribute(self, text: str, attribute_type: str) -> str | None:
+    async def stream_response(self, system_prompt: str, state_prompt: str, user_message: str, history: List[Dict], strategy: Optional[GenerationStrategy] = None) -> AsyncIterator[str]:
+        """
+        Streaming generate_response: the final completion is streamed and cleaned chunk by chunk.
+        TWO_PASS must wait for the brain draft before the voice rewrite can stream.
+        BRAIN_ONLY needs the whole draft for its sentence/question rules, so it arrives as one chunk.
+        """
+        strategy = strategy or self.default_strategy
+        if strategy == GenerationStrategy.BRAIN_ONLY:
+            yield await self.generate_response(system_prompt, state_prompt, user_message, history, strategy)
+            return
+
+        cleaner = StreamingCleaner()
+        if strategy == GenerationStrategy.VOICE_ONLY:
+            stream = self._stream_text("voice_only", **self._brain_request(system_prompt, state_prompt, user_message, history, voice=True))
+        else:
+            draft = await self._prepare_response(system_prompt, state_prompt, user_message, history)
+            if not draft:
+                yield "Hmm, tell me more."
+                return
+            stream = self._stream_text("voice", **self._voice_request(draft))
+        async for delta in stream:
+            text = cleaner.feed(delta)
+            if text: yield text
+        tail = cleaner.flush()
+        if tail: yield tail
+    
+    async def extract_attribute(self, text: str, attribute_type: str) -> str | None:
         prompts = {
             "location": (
                 "Extract the location region.\n"
@@ -99,15 +366,16 @@ class LLMService:
             "age": "Extract age number (e.g., 26). Return 'UNKNOWN' if missing."
         }
         if attribute_type not in prompts: return None
+
+        # Fast path: plain answers ("27", "I'm in Texas") don't need a network call
+        local = extract_local(text, attribute_type)
+        if local.value and local.confidence >= self.local_extraction_min_confidence:
+            self.extraction_stats.record(attribute_type, local=True)
+            return local.value
+        self.extraction_stats.record(attribute_type, local=False)
+
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini", temperature=0.0,
-                messages=[
-                    {"role": "system", "content": f"Data Classifier. {prompts[attribute_type]}"},
-                    {"role": "user", "content": text}
-                ]
-            )
-            result = response.choices[0].message.content.strip().upper()
+            result = (await self._classify(f"Data Classifier. {prompts[attribute_type]}", text)).upper()
             result = re.sub(r'[^A-Z0-9]', '', result)
             if "UNKNOWN" in result: return None
             return result
@@ -115,18 +383,33 @@ class LLMService:
             logger.error(f"Extraction Error: {e}")
             return None
     
+    async def summarize(self, summary: str, messages: List[Dict]) -> str:
+        """
+        Folds `messages` into the rolling conversation summary (background job, not on the reply path).
+        """
+        speakers = {"user": "User", "assistant": "Jamie"}
+        transcript = "\n".join(
+            f"{speakers.get(m['role'], m['role'])}: {truncate_to_tokens(m['content'], Config.CONTEXT_MESSAGE_MAX_TOKENS)}"
+            for m in messages
+        )
+        response = await self._complete(
+            "summary",
+            model=self.classifier_model,
+            temperature=0.0,
+            max_completion_tokens=200,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current notes: {summary or '(none)'}\n\nNew messages:\n{transcript}"}
+            ]
+        )
+        return self._extract_text(response)
+    
     def check_off_topic(self, user_message: str) -> str | None:
-        user_lower = user_message.lower()
+        # Pure keyword check, no network call, so it stays synchronous.
+        matched = OFF_TOPIC_MATCHER.categories(user_message)
         
         # 1. Identity Check (Expanded for typos and variations)
-        identity_keywords =[
-            "are you real", "are you really jamie", "is this a bot", 
-            "is this ai", "are you a bot", "are u a bot",
-            "who is this", "who are you", "who are u", "who r u",
-            "is this jamie", "who am i speaking", "am i speaking to jamie"
-        ]
-        
-        if any(k in user_lower for k in identity_keywords):
+        if "IDENTITY" in matched:
             # EXACT SCRIPT FROM PDF PAGE 1
             return (
                 "I’m Jamie’s notetaker. My job is to understand what guys are struggling with in dating, "
@@ -135,12 +418,12 @@ class LLMService:
             )
         
         # 2. Defensiveness Check
-        if "why are you asking" in user_lower or "why do you need to know" in user_lower:
+        if "DEFENSIVE" in matched:
             return "just trying to get a better picture of where you're at so i can see if we can actually help."
         
         return None
     
-    def classify_post_link_intent(self, text: str) -> str:
+    async def classify_post_link_intent(self, text: str) -> str:
         """
         Determines the user's intent AFTER the link has been sent.
         """
@@ -156,15 +439,7 @@ class LLMService:
         )
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini", # Fast model is fine here
-                temperature=0.0,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ]
-            )
-            return response.choices[0].message.content.strip().upper()
+            return (await self._classify(system_prompt, text)).upper()
         except Exception as e:
             logger.error(f"Intent Classification Error: {e}")
             return "OFF_TOPIC" # Default fallback
\ No newline at end of file
@@ -0,0 +1,117 @@
+# JamieBot/app/services/prompt_registry.py
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.state_machine.states import ConversationState
+
+logger = logging.getLogger(__name__)
+
+# Resolved from the package, not the CWD
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+# Post-link intent -> prompt file (anything unknown falls back to OFF_TOPIC)
+POST_LINK_PROMPTS = {
+    "BOUGHT": "post_link_bought.txt",
+    "QUESTION": "post_link_question.txt",
+    "HESITATION": "post_link_hesitation.txt",
+    "TECH_ISSUE": "post_link_tech.txt",
+    "NEGOTIATION": "post_link_negotiation.txt",
+    "OFF_TOPIC": "post_link_off_topic.txt",
+}
+
+# States answered with fixed replies or intent prompts, so they have no <state>.txt
+NO_STATE_PROMPT = {
+    ConversationState.ROUTE_DISCOVERY_CALL,
+    ConversationState.ROUTE_COURSE_SPECIFIC,
+    ConversationState.ROUTE_FREE_GUIDE,
+    ConversationState.POST_LINK_FLOW,
+    ConversationState.END,
+}
+
+def state_prompt_file(state: ConversationState) -> str:
+    return f"{state.value.lower()}.txt"
+
+def required_prompts() -> List[str]:
+    required = ["system.txt"]
+    required += [state_prompt_file(s) for s in ConversationState if s not in NO_STATE_PROMPT]
+    required += list(POST_LINK_PROMPTS.values())
+    return required
+
+class PromptRegistry:
+    """
+    Keeps every app/prompts/*.txt in memory.
+    Files are read once at startup; a background watcher re-reads only files whose mtime changed.
+    """
+    def __init__(self, prompts_dir: Path = PROMPTS_DIR):
+        self.prompts_dir = Path(prompts_dir)
+        self._prompts: Dict[str, Tuple[int, str]] = {}  # filename -> (mtime_ns, text)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reload()
+
+    def _read(self, path: Path) -> Tuple[int, str]:
+        mtime = path.stat().st_mtime_ns
+        return mtime, path.read_text(encoding="utf-8").strip()
+
+    def reload(self) -> List[str]:
+        """
+        Re-reads new or modified files and drops deleted ones.
+        Returns the filenames that changed.
+        """
+        changed = []
+        with self._lock:
+            seen = set()
+            for path in self.prompts_dir.glob("*.txt"):
+                seen.add(path.name)
+                try:
+                    mtime = path.stat().st_mtime_ns
+                    cached = self._prompts.get(path.name)
+                    if cached and cached[0] == mtime: continue
+                    self._prompts[path.name] = self._read(path)
+                    changed.append(path.name)
+                except OSError as e:
+                    logger.error(f"Prompt Reload Error ({path.name}): {e}")
+            for name in set(self._prompts) - seen:
+                del self._prompts[name]
+                changed.append(name)
+        if changed: logger.info(f"Prompts loaded: {sorted(changed)}")
+        return changed
+
+    def validate(self, required: Optional[List[str]] = None):
+        """
+        Fails fast if any state or post-link intent has no prompt file.
+        """
+        missing = [name for name in (required or required_prompts()) if name not in self._prompts]
+        if missing:
+            raise FileNotFoundError(f"Missing prompt files in {self.prompts_dir}: {missing}")
+
+    def get(self, filename: str) -> str:
+        try:
+            return self._prompts[filename][1]
+        except KeyError:
+            raise FileNotFoundError(f"Prompt not found: {self.prompts_dir / filename}") from None
+
+    def start_watcher(self, interval: float):
+        """
+        Polls mtimes every `interval` seconds in a daemon thread (0 disables hot reload).
+        """
+        if interval <= 0 or self._watcher is not None: return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="prompt-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """
+        Wakes the watcher and joins it; blocking, so async callers should run it in a thread.
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
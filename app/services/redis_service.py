@@ -1,45 +1,165 @@
 # JamieBot/app/services/redis_service.py
-import redis
+import redis.asyncio as redis
 import json
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import Any, List, Dict, Optional, Tuple
 from app.config import Config
+from app.metrics import REDIS_OP_SECONDS
+
+# Check-and-set of the session plus the history append, atomically and in one round trip.
+# KEYS: session, history. ARGV: expected version ("" = don't check), state, attributes, ttl, max messages, messages...
+SAVE_TURN_SCRIPT = """
+local version = tonumber(redis.call('HGET', KEYS[1], 'version') or '0')
+if ARGV[1] ~= '' and tonumber(ARGV[1]) ~= version then return -1 end
+redis.call('HSET', KEYS[1], 'state', ARGV[2], 'attributes', ARGV[3], 'version', version + 1)
+redis.call('HINCRBY', KEYS[1], 'turns', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('RPUSH', KEYS[2], unpack(ARGV, 6))
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[5]), -1)
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return version + 1
+"""
+
+# Appends one delivered follow-up, only if the session still exists.
+# KEYS: session, history. ARGV: message, ttl, max messages.
+ADD_FOLLOWUP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HINCRBY', KEYS[1], 'followups', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('RPUSH', KEYS[2], ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[3]), -1)
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+class SessionConflict(Exception):
+    """The session changed since it was loaded (concurrent, retried or reordered request)."""
+
+@dataclass
+class Session:
+    state: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    turns: int = 0
+    version: int = 0
+    summary: str = ""
+    summary_covers: int = 0  # messages (counted from the first turn) folded into the summary
+    followups: int = 0  # follow-up nudges delivered between turns
+
+    @property
+    def messages(self) -> int:
+        """Messages ever appended to the history: two per turn plus one per follow-up."""
+        return 2 * self.turns + self.followups
+
+def create_client() -> redis.Redis:
+    # Async client: one connection pool per worker, no threadpool slot held while waiting on Redis
+    return redis.Redis(
+        host=Config.REDIS_HOST,
+        port=Config.REDIS_PORT,
+        db=Config.REDIS_DB,
+        password=Config.REDIS_PASSWORD,
+        decode_responses=True # Returns strings instead of bytes
+    )
 
 class RedisService:
     def __init__(self):
-        self.client = redis.Redis(
-            host=Config.REDIS_HOST,
-            port=Config.REDIS_PORT,
-            db=Config.REDIS_DB,
-            password=Config.REDIS_PASSWORD,
-            decode_responses=True # Returns strings instead of bytes
-        )
+        self.client = create_client()
         self.ttl = Config.SESSION_TTL
+        self.max_messages = Config.HISTORY_MAX_MESSAGES
+        self._save_turn = self.client.register_script(SAVE_TURN_SCRIPT)
+        self._add_followup = self.client.register_script(ADD_FOLLOWUP_SCRIPT)
 
-    def get_history(self, user_id: str) -> List[Dict[str, str]]:
+    async def load_session(self, user_id: str, limit: Optional[int] = None) -> Tuple[Session, List[Dict[str, str]]]:
         """
-        Retrieves full chat history for a user.
+        Loads the server-side session and the history tail in one round trip.
         """
-        key = f"jamie_chat:{user_id}"
-        # Get all items in the list (0 to -1)
-        raw_history = self.client.lrange(key, 0, -1)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(f"jamie_session:{user_id}")
+            pipe.hgetall(f"jamie_summary:{user_id}")
+            pipe.lrange(f"jamie_chat:{user_id}", -limit if limit else 0, -1)
+            with REDIS_OP_SECONDS.labels("load_session").time():
+                raw_session, raw_summary, raw_history = await pipe.execute()
+        return self._parse_session(raw_session, raw_summary), [json.loads(msg) for msg in raw_history]
+
+    async def get_session(self, user_id: str) -> Session:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(f"jamie_session:{user_id}")
+            pipe.hgetall(f"jamie_summary:{user_id}")
+            with REDIS_OP_SECONDS.labels("get_session").time():
+                raw_session, raw_summary = await pipe.execute()
+        return self._parse_session(raw_session, raw_summary)
+
+    def _parse_session(self, raw_session: Dict[str, str], raw_summary: Dict[str, str]) -> Session:
+        return Session(
+            state=raw_session.get("state"),
+            attributes=json.loads(raw_session.get("attributes", "{}")),
+            turns=int(raw_session.get("turns", 0)),
+            version=int(raw_session.get("version", 0)),
+            summary=raw_summary.get("text", ""),
+            summary_covers=int(raw_summary.get("covers", 0)),
+            followups=int(raw_session.get("followups", 0))
+        )
+
+    async def get_history_range(self, user_id: str, start: int, end: int) -> List[Dict[str, str]]:
+        """
+        LRANGE over the history (negative indices count from the newest message).
+        """
+        with REDIS_OP_SECONDS.labels("get_history").time():
+            raw_history = await self.client.lrange(f"jamie_chat:{user_id}", start, end)
         return [json.loads(msg) for msg in raw_history]
 
-    def add_message(self, user_id: str, role: str, content: str):
+    async def save_summary(self, user_id: str, text: str, covers: int):
+        key = f"jamie_summary:{user_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"text": text, "covers": covers})
+            pipe.expire(key, self.ttl)
+            with REDIS_OP_SECONDS.labels("save_summary").time():
+                await pipe.execute()
+
+    async def add_followups(self, followups: List[Tuple[str, str]], ttl: Optional[int] = None):
+        """
+        Appends delivered follow-up nudges [(user_id, text), ...] as assistant messages, in one round trip.
+        Sessions that expired meanwhile are skipped rather than recreated. `ttl` (default SESSION_TTL)
+        is what session and history are kept alive for, so the next nudge still finds them.
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            for user_id, text in followups:
+                await self._add_followup(keys=[f"jamie_session:{user_id}", f"jamie_chat:{user_id}"],
+                                   args=[json.dumps({"role": "assistant", "content": text}), ttl or self.ttl, self.max_messages], client=pipe)
+            with REDIS_OP_SECONDS.labels("add_followups").time():
+                await pipe.execute()
+
+    async def save_turn(
+        self,
+        user_id: str,
+        state: str,
+        attributes: Dict[str, Any],
+        user_message: str,
+        reply: str,
+        expected_version: Optional[int] = None
+    ) -> int:
         """
-        Appends a message to the history.
+        Saves the session and appends the turn to the history in one round trip.
+        With expected_version, raises SessionConflict if someone else saved first.
+        Returns the new session version.
         """
-        key = f"jamie_chat:{user_id}"
-        message = {"role": role, "content": content}
-        
-        # Push to right end of list
-        self.client.rpush(key, json.dumps(message))
-        
-        # Reset Expiry (keep session alive)
-        self.client.expire(key, self.ttl)
+        args = [
+            "" if expected_version is None else expected_version,
+            state,
+            json.dumps(attributes),
+            self.ttl,
+            self.max_messages,
+            json.dumps({"role": "user", "content": user_message}),
+            json.dumps({"role": "assistant", "content": reply}),
+        ]
+        with REDIS_OP_SECONDS.labels("save_turn").time():
+            version = await self._save_turn(keys=[f"jamie_session:{user_id}", f"jamie_chat:{user_id}"], args=args)
+        if version == -1:
+            raise SessionConflict(f"Session for {user_id} changed since it was loaded")
+        return version
 
-    def clear_history(self, user_id: str):
+    async def clear_history(self, user_id: str):
         """
-        Clears history (useful when resetting flow).
+        Clears history, session and summary (useful when resetting flow).
         """
-        key = f"jamie_chat:{user_id}"
-        self.client.delete(key)
\ No newline at end of file
+        with REDIS_OP_SECONDS.labels("clear_history").time():
+            await self.client.delete(f"jamie_chat:{user_id}", f"jamie_session:{user_id}", f"jamie_summary:{user_id}")
\ No newline at end of file
@@ -0,0 +1,76 @@
+# JamieBot/app/services/response_cache.py
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_input(text: str) -> str:
+    # Case and whitespace only; punctuation and symbols ("$500") can change the answer
+    return " ".join(text.lower().split())
+
+def cache_key(model: str, system_prompt: str, user_text: str) -> str:
+    """
+    Content address of a deterministic call. The prompt text is part of the key,
+    so editing a prompt invalidates its cached answers.
+    """
+    payload = json.dumps([model, system_prompt, normalize_input(user_text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache for temperature 0 classifier answers:
+    an in-process LRU (size cap + TTL) in front of an optional shared Redis tier (TTL).
+    """
+    def __init__(self, max_entries: int, ttl: int, redis_client=None, prefix: str = "jamie_llm_cache:"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis = redis_client
+        self.prefix = prefix
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (expires_at, value)
+        self.stats = {"hits": 0, "redis_hits": 0, "misses": 0, "evictions": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._entries[key]
+            self.stats["evictions"] += 1
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(self.prefix + key)
+            except Exception as e:
+                logger.error(f"LLM Cache Redis Error: {e}")
+                value = None
+            if value is not None:
+                self._store(key, value)
+                self.stats["redis_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        self._store(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.prefix + key, value, ex=self.ttl)
+            except Exception as e:
+                logger.error(f"LLM Cache Redis Error: {e}")
+
+    def _store(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "size": len(self._entries), "max_entries": self.max_entries}
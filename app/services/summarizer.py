@@ -0,0 +1,68 @@
+# JamieBot/app/services/summarizer.py
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, List, Set
+from app.config import Config
+from app.metrics import SUMMARY_UPDATES
+from app.services.redis_service import RedisService, Session
+
+if TYPE_CHECKING:  # keeps the OpenAI SDK out of `import app.api.routes`
+    from app.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "[CONVERSATION SO FAR]: "
+
+def with_summary(session: Session, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Replaces the messages the rolling summary already covers with the summary itself
+    (as a leading system message, which the context assembler pins).
+    The history tail starts at session.messages - len(history).
+    """
+    if not session.summary: return history
+    first = max(session.messages, len(history)) - len(history)
+    return [{"role": "system", "content": SUMMARY_PREFIX + session.summary}] + history[max(0, session.summary_covers - first):]
+
+class ConversationSummarizer:
+    """
+    Keeps jamie_summary:{user_id} covering everything but the last `keep_recent` messages.
+    Runs as a background task after the turn is saved, so it never delays a reply;
+    at most one update per user is in flight in this process.
+    """
+    def __init__(self, llm_service: "LLMService", redis_service: RedisService):
+        self.llm_service = llm_service
+        self.redis_service = redis_service
+        self.enabled = Config.SUMMARY_ENABLED
+        self.keep_recent = Config.SUMMARY_KEEP_RECENT
+        self.min_new = Config.SUMMARY_MIN_NEW
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()  # keeps fire-and-forget tasks referenced
+
+    def schedule(self, user_id: str):
+        if not self.enabled or user_id in self._running: return
+        self._running.add(user_id)
+        task = asyncio.create_task(self.update(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def update(self, user_id: str):
+        try:
+            session = await self.redis_service.get_session(user_id)
+            total = session.messages
+            target = total - self.keep_recent
+            if target - session.summary_covers < self.min_new:
+                return
+
+            # Messages trimmed out of Redis before they were summarized are gone; start at the oldest kept
+            start = max(session.summary_covers, total - Config.HISTORY_MAX_MESSAGES)
+            messages = await self.redis_service.get_history_range(user_id, start - total, target - total - 1)
+            if not messages: return
+            text = await self.llm_service.summarize(session.summary, messages)
+            if not text: return
+            await self.redis_service.save_summary(user_id, text, target)
+            SUMMARY_UPDATES.labels("ok").inc()
+        except Exception as e:
+            SUMMARY_UPDATES.labels("error").inc()
+            logger.error(f"Summary Error: {e}")
+        finally:
+            self._running.discard(user_id)
@@ -0,0 +1,61 @@
+# JamieBot/app/services/template_replies.py
+import random
+from string import Formatter
+from typing import Dict, List, Optional, Set
+from app.routing.problem_inference import ProblemTag
+from app.services.prompt_registry import PromptRegistry
+
+# How extracted attributes read inside a sentence
+PROBLEM_PHRASES = {
+    ProblemTag.TEXTING: "the texting side",
+    ProblemTag.MATCHES: "getting matches",
+    ProblemTag.APPROACH: "approaching women",
+    ProblemTag.SPARK: "creating that spark",
+    ProblemTag.ESCALATION: "moving things forward",
+    ProblemTag.CONFIDENCE: "the confidence piece",
+}
+REGION_NAMES = {"US": "the US", "CANADA": "Canada", "EU": "Europe"}
+
+def variants_file(state: str) -> str:
+    return f"{state.lower()}_variants.txt"
+
+def parse_template_states(raw: str) -> Set[str]:
+    return {s.strip().upper() for s in raw.split(",") if s.strip()}
+
+def parse_variants(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+def template_fields(attributes: Dict[str, any]) -> Dict[str, str]:
+    fields = {}
+    problem = attributes.get("primary_problem")
+    if problem:
+        try: fields["problem"] = PROBLEM_PHRASES[ProblemTag(problem)]
+        except (ValueError, KeyError): pass
+    region = REGION_NAMES.get(attributes.get("location_region"))
+    if region: fields["region"] = region
+    return fields
+
+class TemplateReplies:
+    """
+    Reply mode for states that ask a near-fixed question: a random pre-voiced variant
+    from <state>_variants.txt, personalised from extracted attributes. No completions.
+    """
+    def __init__(self, prompts: PromptRegistry, states: Set[str], rng: Optional[random.Random] = None):
+        self.prompts = prompts
+        self.states = states
+        self.rng = rng or random.Random()
+
+    def enabled_for(self, state: str) -> bool:
+        return state in self.states
+
+    def render(self, state: str, attributes: Optional[Dict[str, any]]) -> Optional[str]:
+        """Returns None when the state isn't template-served or has no usable variant (caller generates instead)."""
+        if state not in self.states: return None
+        try:
+            variants = parse_variants(self.prompts.get(variants_file(state)))
+        except FileNotFoundError:
+            return None
+        fields = template_fields(attributes or {})
+        usable = [v for v in variants if all(name in fields for _, name, _, _ in Formatter().parse(v) if name)]
+        if not usable: return None
+        return self.rng.choice(usable).format(**fields)
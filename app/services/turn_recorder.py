@@ -0,0 +1,149 @@
+# JamieBot/app/services/turn_recorder.py
+import copy
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# LLM calls (and template picks) of the turn being recorded in this task; None = not recording
+_calls: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("jamie_recorded_calls", default=None)
+
+def request_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """What replay matches a recorded response on: same model, same messages."""
+    payload = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def record_call(purpose: str, response: str, model: str = "", messages: Optional[List[Dict[str, str]]] = None, **extra):
+    """
+    Notes one LLM answer (or other non-deterministic pick, e.g. purpose="template") for the
+    turn being recorded. No-op outside a recorded turn.
+    """
+    calls = _calls.get()
+    if calls is None: return
+    call = {"purpose": purpose, "response": response, **extra}
+    if messages is not None:
+        call.update(key=request_key(model, messages), model=model, messages=messages)
+    calls.append(call)
+
+def isolate_calls() -> Optional[List[Dict[str, Any]]]:
+    """
+    Gives the current task its own call list, apart from the recorded turn it was started from
+    (tasks inherit the turn's context). Returns it (None when not recording) for add_calls.
+    """
+    calls = [] if _calls.get() is not None else None
+    _calls.set(calls)
+    return calls
+
+def add_calls(calls: Optional[List[Dict[str, Any]]]):
+    """Adds calls kept apart with isolate_calls to the turn being recorded."""
+    current = _calls.get()
+    if current is not None and calls: current.extend(calls)
+
+def read_recordings(paths: List[str]):
+    """Yields recorded turns from .jsonl / .jsonl.gz files or directories of them."""
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.glob("*.jsonl*")) if path.is_dir() else [path]
+    for path in files:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip(): yield json.loads(line)
+
+class TurnRecorder:
+    """
+    Opt-in capture of /process-message turns for replay (benchmarks/replay_turns.py):
+    inputs, every LLM request/response, the result and timings, one JSON line per turn in
+    gzipped files rotated hourly (turns-<yyyymmdd-hh>-<pid>.jsonl.gz).
+    Lines are written by a background thread, so recording adds no file I/O to the turn.
+    """
+    def __init__(self, directory: str, sample_rate: float = 1.0):
+        self.directory = Path(directory) if directory else None
+        self.sample_rate = sample_rate
+        self.stats = {"recorded": 0, "dropped": 0}
+        self._queue: "queue.SimpleQueue[Dict]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None and self.sample_rate > 0
+
+    def turn(self, user_id: str, message: str, state: str, attributes: Optional[Dict], history: List[Dict]) -> "_Recording":
+        if not self.enabled or random.random() >= self.sample_rate:
+            return _Recording(None, {})
+        self._start_writer()
+        return _Recording(self, {
+            "v": 1,
+            "id": uuid.uuid4().hex[:12],
+            "ts": round(time.time(), 3),
+            "user_id": user_id,
+            "message": message,
+            "state": state,
+            # The orchestrator writes into the attributes, keep what it was given
+            "attributes": copy.deepcopy(attributes or {}),
+            "history": history,
+        })
+
+    def _start_writer(self):
+        if self._writer is not None: return
+        with self._lock:
+            if self._writer is not None: return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name="turn-recorder", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            lines = [self._queue.get()]
+            while True:  # drain whatever queued up meanwhile into one write
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            name = f"turns-{time.strftime('%Y%m%d-%H')}-{os.getpid()}.jsonl.gz"
+            try:
+                # Appending makes a multi-member gzip, which gzip readers handle as one stream
+                with gzip.open(self.directory / name, "at", encoding="utf-8") as f:
+                    f.writelines(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n" for line in lines)
+                self.stats["recorded"] += len(lines)
+            except OSError as e:
+                self.stats["dropped"] += len(lines)
+                logger.error(f"Turn Recorder Error: {e}")
+
+class _Recording:
+    """One turn being recorded; set .result before leaving the block."""
+    def __init__(self, recorder: Optional[TurnRecorder], record: Dict[str, Any]):
+        self.recorder = recorder
+        self.record = record
+        self.result: Optional[Dict[str, Any]] = None
+        self._token = None
+
+    def __enter__(self):
+        if self.recorder is not None:
+            self.record["calls"] = []
+            self._token = _calls.set(self.record["calls"])
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.recorder is None: return False
+        _calls.reset(self._token)
+        self.record["ms"] = round((time.perf_counter() - self._started) * 1000, 1)
+        if exc is not None:
+            self.record["error"] = f"{exc_type.__name__}: {exc}"
+        elif self.result is not None:
+            self.record["result"] = {k: self.result.get(k) for k in ("reply", "next_state", "extracted_attributes", "progress_score")}
+        self.recorder._queue.put(self.record)
+        return False
@@ -0,0 +1,57 @@
+# JamieBot/app/speculation.py
+import threading
+from typing import Dict, Optional
+from app.keyword_matcher import KeywordMatcher
+from app.state_machine.states import ConversationState
+
+# States whose turn waits on an LLM call (extraction, intent classification) before the
+# reply can be generated, with the states their turn can move to. The funnel stages before
+# them have no remote work to overlap with, and QUAL_FINANCE always moves to a ROUTE_* state,
+# whose reply needs no generation. QUAL targets are skipped while template-served (the default).
+SPECULATIVE_STATES = {
+    ConversationState.STAGE_10_QUAL_LOCATION: {ConversationState.STAGE_10_QUAL_AGE},
+    ConversationState.STAGE_10_QUAL_AGE: {ConversationState.STAGE_10_QUAL_RELATIONSHIP, ConversationState.STAGE_10_QUAL_FITNESS},
+    ConversationState.POST_LINK_FLOW: {ConversationState.POST_LINK_FLOW},
+}
+
+# Local guess of the post-link intent the classifier will return; no guess, no speculation
+POST_LINK_HINTS = KeywordMatcher({
+    "BOUGHT": ["bought", "booked", "paid", "purchased", "signed up", "just did", "done"],
+    "TECH_ISSUE": ["not working", "doesnt work", "doesn't work", "error", "won't load", "wont load", "broken link"],
+    "NEGOTIATION": ["discount", "too expensive", "cheaper", "payment plan", "coupon"],
+    "HESITATION": ["later", "not sure", "need to think", "think about it", "maybe"],
+    "QUESTION": ["?"],
+})
+POST_LINK_HINT_PRIORITY = ["BOUGHT", "TECH_ISSUE", "NEGOTIATION", "HESITATION", "QUESTION"]
+
+def guess_post_link_intent(text: str) -> Optional[str]:
+    return POST_LINK_HINTS.first(text, POST_LINK_HINT_PRIORITY)
+
+class SpeculationStats:
+    """
+    Per-state counters for speculative generation.
+    saved_seconds is the planning time the reply generation overlapped with on a hit.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_state: Dict[str, Dict[str, float]] = {}
+
+    def record(self, state: ConversationState, hit: bool, saved_seconds: float = 0.0):
+        with self._lock:
+            row = self._by_state.setdefault(state.value, {"attempts": 0, "hits": 0, "saved_seconds": 0.0})
+            row["attempts"] += 1
+            if hit:
+                row["hits"] += 1
+                row["saved_seconds"] += saved_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            report = {}
+            for state, row in self._by_state.items():
+                report[state] = {
+                    "attempts": row["attempts"],
+                    "hits": row["hits"],
+                    "hit_rate": round(row["hits"] / row["attempts"], 3),
+                    "avg_saved_ms": round(1000 * row["saved_seconds"] / row["hits"]) if row["hits"] else 0,
+                }
+            return report
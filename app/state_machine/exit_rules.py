@@ -1,6 +1,7 @@
 # JamieBot/app/state_machine/exit_rules.py
 import re
 import unicodedata
+from app.keyword_matcher import KeywordMatcher
 
 # 1. TEXT NORMALIZATION (Still needed for the Orchestrator)
 def normalize_text(text: str) -> str:
@@ -13,16 +14,19 @@ def normalize_text(text: str) -> str:
     return text
 
 # 2. ABUSE DETECTION (Still needed for the ENTRY state)
+# "*" = stem, any suffix also matches ("fuck*" -> "fuckin", "fucker", "kill*" -> "killed").
+# "die" is listed per inflection: as a stem it would also catch "diet", "diesel"
 ABUSIVE_KEYWORDS = {
-    "fuck", "fucking", "fuck off",
-    "bitch", "slut", "whore",
-    "asshole", "dumbass",
-    "retard", "nigger", "rape",
-    "kill", "die", "kys", "go die",
+    "fuck*", "motherfuck*", "fuck off",
+    "bitch*", "slut*", "whore*",
+    "asshole*", "dumbass*",
+    "retard*", "nigger*", "rape*",
+    "kill*", "die", "died", "dies", "kys", "go die",
 }
+ABUSE_MATCHER = KeywordMatcher({"ABUSE": ABUSIVE_KEYWORDS})
 
 def is_abusive(text: str) -> bool:
-    return any(word in text for word in ABUSIVE_KEYWORDS)
+    return ABUSE_MATCHER.matches(text)
 
 def entry_boundary_action(normalized_text: str, extracted_attributes: dict) -> str:
     """
@@ -44,19 +48,21 @@ def entry_boundary_action(normalized_text: str, extracted_attributes: dict) -> s
 
 # 3. ENTRY SKIPPING LOGIC (Updated for Intent Detection)
 # If the user uses ANY of these words, we skip "How is your day?"
+# "*" = stem, any suffix also matches ("relationship*" -> "relationships", "struggl*" -> "struggled")
 DATING_KEYWORDS = {
     # Core Dating Terms
-    "date", "dating", "love life", "girlfriend", "boyfriend",
-    "single", "matches", "tinder", "hinge", "bumble", "ghosted",
-    "relationship", "hookups", "talking stage", 
+    "date*", "dating", "love life", "girlfriend*", "boyfriend*",
+    "single*", "match*", "tinder", "hinge", "bumble", "ghost*",
+    "relationship*", "hookup*", "talking stage*",
     
     # Business/Intent Terms (NEW)
-    "help", "advice", "tips", "guidance",
-    "course", "coaching", "program", "class",
-    "interested", "info", "details",
-    "jamie", "video", "content", "seen you", "watch you",
-    "struggle", "problem", "hard", "shy", "nervous"
+    "help*", "advice", "tips", "guidance",
+    "course*", "coach*", "program*", "class*",
+    "interested", "info*", "details",
+    "jamie", "video*", "content", "seen you", "watch you",
+    "struggl*", "problem*", "hard*", "shy", "nervous*",
 }
+DATING_MATCHER = KeywordMatcher({"DATING": DATING_KEYWORDS})
 
 ORIENTATION_PHRASES = {
     "hi", "hello", "hey", "hey there", "yo", "sup",
@@ -69,7 +75,7 @@ def is_orientation_only(text: str) -> bool:
 
 def has_dating_context(text: str) -> bool:
     # If the message contains specific keywords
-    return any(word in text for word in DATING_KEYWORDS)
+    return DATING_MATCHER.matches(text)
 
 def should_exit_entry(text: str) -> bool:
     """
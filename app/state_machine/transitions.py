@@ -4,6 +4,10 @@ from app.state_machine.states import ConversationState
 from app.state_machine.exit_rules import (
     normalize_text, entry_boundary_action, should_exit_entry
 )
+from app.keyword_matcher import KeywordMatcher
+
+# Relationship goal volunteered while answering the age question
+SERIOUS_GOAL_MATCHER = KeywordMatcher({"SERIOUS": ["marriage", "wife", "husband", "long term", "serious relationship"]})
 
 def determine_next_state(
     current_state: ConversationState,
@@ -57,7 +61,7 @@ def determine_next_state(
 
     if current_state == ConversationState.STAGE_10_QUAL_AGE:
         # Check to skip relationship question if already answered
-        if any(w in normalized for w in ["marriage", "wife", "husband", "long term", "serious relationship"]):
+        if SERIOUS_GOAL_MATCHER.matches(normalized):
             extracted_attributes["relationship_goal"] = "SERIOUS"
             return ConversationState.STAGE_10_QUAL_FITNESS
         return ConversationState.STAGE_10_QUAL_RELATIONSHIP
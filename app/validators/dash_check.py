@@ -0,0 +1,10 @@
+# JamieBot/app/validators/dash_check.py
+import re
+
+DASH_PATTERN = re.compile(r'[—–]|\s-\s')
+
+def validate_no_dashes(text: str) -> bool:
+    """
+    Validates that the text contains no em/en dashes or spaced hyphens.
+    """
+    return not DASH_PATTERN.search(text)
@@ -1,12 +1,15 @@
 # JamieBot/app/validators/length_check.py
 import re
 
+# A sentence ends at "!", "?" or a single "." followed by whitespace.
+# "..." is Jamie's pause (used instead of dashes), so it does not end a sentence.
+SENTENCE_BREAK = re.compile(r'(?<=[!?])\s+|(?<=[^.]\.)\s+')
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_BREAK.split(text.strip()) if s.strip()]
+
 def validate_length(text: str) -> bool:
     """
     Validates that the text contains no more than 2 sentences.
     """
-    # Split sentences by punctuation
-    sentences = re.split(r'[.!?]+', text)
-    # Remove empty strings
-    sentences = [s.strip() for s in sentences if s.strip()]
-    return len(sentences) <= 2
+    return len(split_sentences(text)) <= 2
@@ -1,23 +1,21 @@
 # JamieBot/app/validators/safety_check.py
+from app.keyword_matcher import KeywordMatcher
+
+# "*" = stem, any suffix also matches ("porn*" -> "porno", "sex*" -> "sexual", "sexting")
 UNSAFE_KEYWORDS = {
-    "nude",
-    "nudes",
-    "sex",
+    "nude*",
+    "sex*",
     "onlyfans",
-    "explicit",
-    "porn",
-    "hookup",
+    "only fans",
+    "explicit*",
+    "porn*",
+    "hookup*",
 }
+UNSAFE_MATCHER = KeywordMatcher({"UNSAFE": UNSAFE_KEYWORDS})
 
 
 def validate_safety(text: str) -> bool:
     """
     Checks for unsafe or disallowed language.
     """
-    
-    lowered = text.lower()
-    for keyword in UNSAFE_KEYWORDS:
-        if keyword in lowered:
-            return False
-    
-    return True
+    return not UNSAFE_MATCHER.matches(text)
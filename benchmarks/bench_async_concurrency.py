@@ -0,0 +1,205 @@
+# JamieBot/benchmarks/bench_async_concurrency.py
+"""
+How many concurrent conversations can one worker serve?
+
+BEFORE: the old sync `def process_message` route. FastAPI runs it in the anyio
+threadpool (40 slots by default) and each turn blocks a slot on every OpenAI
+and Redis round trip.
+AFTER: the real async route (`app.api.routes.process_message`) driven in-process
+through httpx's ASGI transport, with OpenAI and Redis replaced by fakes that
+await a fixed latency. No network is used.
+
+Usage: python -m benchmarks.bench_async_concurrency [--llm-ms 800] [--redis-ms 1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import anyio
+import httpx
+
+THREADPOOL_SLOTS = 40  # anyio default limiter used by FastAPI for sync routes
+
+
+class FakeAsyncCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="how long has this been going on?"))])
+
+
+class FakeAsyncRedis:
+    """Just enough of redis.asyncio for RedisService; every round trip awaits `latency`."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lists = {}
+        self.hashes = {}
+
+    def _slice(self, items, start, end):
+        end = len(items) if end == -1 else end + 1
+        return items[start:end] if start >= 0 else items[max(len(items) + start, 0):end]
+
+    async def lrange(self, key, start, end):
+        await asyncio.sleep(self.latency)
+        return list(self._slice(self.lists.get(key, []), start, end))
+
+    async def delete(self, *keys):
+        await asyncio.sleep(self.latency)
+        for key in keys:
+            self.lists.pop(key, None)
+            self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        # Only RedisService.SAVE_TURN_SCRIPT is registered; replay its logic in Python
+        async def save_turn(keys, args):
+            await asyncio.sleep(self.latency)
+            session = self.hashes.setdefault(keys[0], {})
+            version = int(session.get("version", 0))
+            if args[0] != "" and int(args[0]) != version:
+                return -1
+            session.update(state=args[1], attributes=args[2], version=str(version + 1), turns=str(int(session.get("turns", 0)) + 1))
+            history = self.lists.setdefault(keys[1], [])
+            history.extend(args[5:])
+            self.lists[keys[1]] = history[-int(args[4]):]
+            return version + 1
+        return save_turn
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hgetall(self, key):
+        self.ops.append(lambda: dict(self.redis.hashes.get(key, {})))
+
+    def lrange(self, key, start, end):
+        self.ops.append(lambda: list(self.redis._slice(self.redis.lists.get(key, []), start, end)))
+
+    def hset(self, key, mapping):
+        self.ops.append(lambda: self.redis.hashes.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()}))
+
+    def rpush(self, key, *values):
+        self.ops.append(lambda: self.redis.lists.setdefault(key, []).extend(values))
+
+    def ltrim(self, key, start, end):
+        self.ops.append(lambda: self.redis.lists.__setitem__(key, self.redis._slice(self.redis.lists.get(key, []), start, end)))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: None)
+
+    async def execute(self):
+        await asyncio.sleep(self.redis.latency)
+        return [op() for op in self.ops]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _summary(label, concurrency, latencies, elapsed):
+    return {
+        "mode": label,
+        "concurrency": concurrency,
+        "turns_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000),
+        "p95_ms": round(_percentile(latencies, 95) * 1000),
+    }
+
+
+async def run_before(concurrency, turns, llm_latency, redis_latency):
+    """Old sync route: 2 LLM calls + 5 Redis round trips per turn, each blocking a thread."""
+    def sync_turn():
+        time.sleep(redis_latency)       # LRANGE
+        time.sleep(llm_latency)         # brain
+        time.sleep(llm_latency)         # voice rewrite
+        for _ in range(4):              # RPUSH + EXPIRE, twice
+            time.sleep(redis_latency)
+
+    latencies = []
+
+    async def conversation():
+        for _ in range(turns):
+            t0 = time.perf_counter()
+            await anyio.to_thread.run_sync(sync_turn)
+            latencies.append(time.perf_counter() - t0)
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SLOTS
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation() for _ in range(concurrency)))
+    return _summary("before_sync", concurrency, latencies, time.perf_counter() - start)
+
+
+async def run_after(concurrency, turns, llm_latency, redis_latency):
+    from app.main import app
+    from app.api.dependencies import init_services
+    from app.services.redis_service import SAVE_TURN_SCRIPT
+
+    # The route resolves the same per-process services through its dependency
+    services = await init_services()
+    services.orchestrator.llm_service.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeAsyncCompletions(llm_latency)))
+    services.redis_service.client = FakeAsyncRedis(redis_latency)
+    services.redis_service._save_turn = services.redis_service.client.register_script(SAVE_TURN_SCRIPT)
+    services.coalescer.window = 0.0  # one message per request and user, nothing to debounce
+    services.admission.max_concurrent = 0  # measures the event loop itself, not the admission cap
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def conversation(idx):
+            for _ in range(turns):
+                t0 = time.perf_counter()
+                resp = await client.post("/process-message", json={
+                    "user_id": f"bench_{idx}",
+                    "message": "i just can't get any matches",
+                    "current_state": "STAGE_2_TIME_COST",
+                    "user_attributes": {},
+                })
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(i) for i in range(concurrency)))
+    return _summary("after_async", concurrency, latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=800.0, help="Latency of one fake OpenAI completion")
+    parser.add_argument("--redis-ms", type=float, default=1.0, help="Latency of one fake Redis round trip")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per conversation")
+    parser.add_argument("--concurrency", default="10,40,100,200,400", help="Comma separated concurrency levels")
+    args = parser.parse_args()
+
+    llm_latency, redis_latency = args.llm_ms / 1000, args.redis_ms / 1000
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    results = []
+    for level in levels:
+        results.append(asyncio.run(run_before(level, args.turns, llm_latency, redis_latency)))
+        results.append(asyncio.run(run_after(level, args.turns, llm_latency, redis_latency)))
+
+    for row in results:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# JamieBot/benchmarks/bench_comment_batch.py
+"""
+Comment throughput: N calls to /process-comment vs one /process-comments batch
+(JSON array and NDJSON), driven in-process through the ASGI app (no network).
+
+The synthetic batch mimics a viral reel: mostly repeated emoji / "info" comments
+plus a tail of unique text.
+
+Usage: python -m benchmarks.bench_comment_batch [--comments 10000] [--unique 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+COMMON = ["🔥", "🔥🔥🔥", "info", "Info!", "interested", "how much?", "❤️", "wow", "link pls", "does this work for beginners?"]
+
+
+def make_comments(count, unique_ratio, seed=7):
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        text = f"comment {i} about dating and the price maybe" if rng.random() < unique_ratio else rng.choice(COMMON)
+        comments.append({"platform": rng.choice(["INSTAGRAM", "FACEBOOK", "YOUTUBE"]), "user_id": f"u{i}", "comment_text": text, "post_id": "reel_1"})
+    return comments
+
+
+async def run(count, unique_ratio, concurrency):
+    from app.main import app
+    comments = make_comments(count, unique_ratio)
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        # Per-request path, with `concurrency` requests in flight
+        queue = list(comments)
+
+        async def worker():
+            while queue:
+                resp = await client.post("/process-comment", json=queue.pop())
+                resp.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        results.append(("per_request", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        resp = await client.post("/process-comments", json=comments)
+        resp.raise_for_status()
+        assert len(resp.json()) == count
+        results.append(("batch_json", time.perf_counter() - start))
+
+        body = "\n".join(json.dumps(c, ensure_ascii=False) for c in comments)
+        start = time.perf_counter()
+        resp = await client.post("/process-comments", content=body.encode("utf-8"), headers={"Content-Type": "application/x-ndjson"})
+        resp.raise_for_status()
+        assert len(resp.text.splitlines()) == count
+        results.append(("batch_ndjson", time.perf_counter() - start))
+
+    for mode, elapsed in results:
+        print(json.dumps({"mode": mode, "comments": count, "seconds": round(elapsed, 3), "comments_per_sec": round(count / elapsed)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--unique", type=float, default=0.1, help="Fraction of comments with unique text")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests for the per-request path")
+    args = parser.parse_args()
+    asyncio.run(run(args.comments, args.unique, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
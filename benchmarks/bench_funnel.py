@@ -0,0 +1,217 @@
+# JamieBot/benchmarks/bench_funnel.py
+"""
+Offline end-to-end benchmark of the setter funnel.
+
+Drives the scripted conversations in benchmarks/data/funnel_scripts.jsonl
+(ENTRY -> STAGE_1..STAGE_10 -> each ROUTE_* -> POST_LINK_FLOW) through the real
+/process-message route in session mode: Orchestrator, LLMService and RedisService
+all run as in production, only the OpenAI client and Redis connection are replaced
+by deterministic in-memory fakes (seeded latency, scripted classifier answers).
+No network is used.
+
+Reports per concurrency level: turn latency percentiles, LLM calls and bytes sent
+to the model per turn (by purpose), turns/sec, plus per-state rows. Output is
+JSON lines; --out also writes one JSON document to diff across commits with --compare.
+
+Usage: python -m benchmarks.bench_funnel [--llm-ms 600] [--llm-jitter-ms 200] [--concurrency 1,10,50] [--out funnel.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.bench_async_concurrency import FakeAsyncRedis
+from benchmarks.mock_openai import PrefixCache
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), "data", "funnel_scripts.jsonl")
+REPLY = "that makes sense. how long has this been going on for you?"
+SUMMARY = "Gets matches but no dates for two years, wants a long term relationship, tried youtube and paid apps."
+# Routing replies are fixed text; identify which outcome a conversation actually reached
+ROUTE_MARKERS = {"ROUTE_DISCOVERY_CALL": "privatecoaching", "ROUTE_COURSE_SPECIFIC": "a course designed", "ROUTE_FREE_GUIDE": "library of self-guided"}
+
+
+class ScriptedCompletions:
+    """
+    Deterministic stand-in for chat.completions: classifier calls answer from the
+    scripts ("llm" field, keyed by user text), brain/voice calls return a fixed reply.
+    Latency is drawn from a seeded uniform(llm_ms ± jitter).
+    """
+    def __init__(self, llm, answers, latency, jitter, seed=7):
+        self.purposes = {llm.brain_model: "brain", llm.voice_model: "voice", llm.classifier_model: "classify"}
+        self.answers = answers
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.bytes = Counter()
+        self.prefix_cache = PrefixCache()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    async def create(self, **kwargs):
+        messages = kwargs["messages"]
+        purpose = self.purposes.get(kwargs["model"], kwargs["model"])
+        if messages[0]["content"].startswith("You keep notes"): purpose = "summary"
+        self.calls[purpose] += 1
+        self.bytes[purpose] += len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+        prompt_tokens, cached_tokens = self.prefix_cache.lookup(messages)
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+        if purpose == "summary":
+            content = SUMMARY
+        elif purpose == "classify":
+            content = self.answers.get(messages[-1]["content"], "UNKNOWN" if messages[0]["content"].startswith("Data Classifier") else "OFF_TOPIC")
+        else:
+            content = REPLY
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def snapshot(self):
+        return dict(self.calls), dict(self.bytes)
+
+
+def load_scripts(path=SCRIPTS):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+async def run_level(concurrency, scripts, llm_latency, jitter, redis_latency, coalesce_window=0.0):
+    from app.api import routes
+    from app.api.dependencies import init_services
+    from app.schemas import AIRequest
+    from app.services.redis_service import SAVE_TURN_SCRIPT
+
+    services = await init_services()
+    llm = services.orchestrator.llm_service
+    answers = {turn["message"]: turn["llm"] for script in scripts for turn in script["turns"] if "llm" in turn}
+    fake = ScriptedCompletions(llm, answers, llm_latency, jitter)
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    llm.classifier_cache._entries.clear()  # every level starts cold
+    services.redis_service.client = FakeAsyncRedis(redis_latency)
+    services.redis_service._save_turn = services.redis_service.client.register_script(SAVE_TURN_SCRIPT)
+    # Scripted users wait for each reply, so the debounce window would only add latency
+    services.coalescer.window = coalesce_window
+    services.admission.max_concurrent = 0  # concurrency levels above the cap would only measure queueing
+
+    latencies, by_state, routes_reached = [], defaultdict(list), Counter()
+    failures = []
+
+    async def conversation(idx):
+        script = scripts[idx % len(scripts)]
+        user_id, state = f"funnel_{idx}", "ENTRY"
+        for turn in script["turns"]:
+            started = time.perf_counter()
+            response = await routes.process_message(AIRequest(user_id=user_id, message=turn["message"]), services)
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            by_state[state].append(elapsed)
+            if state == "STAGE_10_QUAL_FINANCE":
+                route = next((r for r, marker in ROUTE_MARKERS.items() if marker in response.reply), None)
+                routes_reached[route] += 1
+                if route != script["expect_route"]: failures.append(f"{script['name']}#{idx} routed to {route}")
+            state = response.next_state
+        if state != "POST_LINK_FLOW": failures.append(f"{script['name']}#{idx} ended in {state}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    calls, sent = fake.snapshot()
+    turns = len(latencies)
+    summary = {
+        "kind": "summary",
+        "concurrency": concurrency,
+        "conversations": concurrency,
+        "turns": turns,
+        "turns_per_sec": round(turns / elapsed, 1),
+        "p50_ms": _ms(statistics.median(latencies)),
+        "p90_ms": _ms(_percentile(latencies, 90)),
+        "p99_ms": _ms(_percentile(latencies, 99)),
+        "llm_calls_per_turn": round(sum(calls.values()) / turns, 3),
+        "llm_bytes_per_turn": round(sum(sent.values()) / turns),
+        # Share of prompt tokens a provider prefix cache could serve (simulated, see mock_openai.PrefixCache)
+        "llm_cached_token_ratio": round(fake.cached_tokens / fake.prompt_tokens, 3) if fake.prompt_tokens else 0.0,
+        "llm_calls_by_purpose": calls,
+        "llm_bytes_by_purpose": sent,
+        "routes_reached": dict(routes_reached),
+        "failures": failures,
+    }
+    states = [
+        {"kind": "state", "concurrency": concurrency, "state": state, "turns": len(values),
+         "p50_ms": _ms(statistics.median(values)), "p99_ms": _ms(_percentile(values, 99))}
+        for state, values in by_state.items()
+    ]
+    return summary, states
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    """Ratios current / baseline for the headline metrics, per concurrency level."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["concurrency"]: row for row in json.load(f)["summaries"]}
+    for row in current:
+        base = baseline.get(row["concurrency"])
+        if not base: continue
+        yield {
+            "kind": "compare",
+            "concurrency": row["concurrency"],
+            **{f"{metric}_ratio": round(row[metric] / base[metric], 3) if base[metric] else None
+               for metric in ("p50_ms", "p99_ms", "turns_per_sec", "llm_calls_per_turn", "llm_bytes_per_turn", "llm_cached_token_ratio") if metric in base},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=600.0, help="Mean latency of one fake OpenAI completion")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0, help="Uniform jitter around --llm-ms")
+    parser.add_argument("--redis-ms", type=float, default=1.0, help="Latency of one fake Redis round trip")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma separated numbers of concurrent conversations")
+    parser.add_argument("--coalesce-ms", type=float, default=0.0, help="Burst debounce window (COALESCE_WINDOW_SECONDS) during the run")
+    parser.add_argument("--scripts", default=SCRIPTS)
+    parser.add_argument("--out", help="Write all results as one JSON document")
+    parser.add_argument("--compare", help="Baseline JSON document from a previous --out")
+    args = parser.parse_args()
+
+    scripts = load_scripts(args.scripts)
+    summaries, states = [], []
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        summary, per_state = asyncio.run(run_level(level, scripts, args.llm_ms / 1000, args.llm_jitter_ms / 1000, args.redis_ms / 1000, args.coalesce_ms / 1000))
+        summaries.append(summary)
+        states.extend(per_state)
+
+    for row in summaries + states:
+        print(json.dumps(row))
+    if args.compare:
+        for row in compare(summaries, args.compare):
+            print(json.dumps(row))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"commit": _git_commit(), "args": vars(args), "summaries": summaries, "states": states}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
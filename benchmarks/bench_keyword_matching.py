@@ -0,0 +1,85 @@
+# JamieBot/benchmarks/bench_keyword_matching.py
+"""
+Microbenchmark: shared KeywordMatcher vs. the previous `any(k in text for k in SET)` scans.
+
+For each keyword consumer it times both implementations over a message corpus and
+lists the messages where they disagree (mostly substring false positives such as
+"sex" in "Essex", "die" in "indie", "age" in "message").
+
+Usage: python -m benchmarks.bench_keyword_matching [--repeat 2000]
+"""
+import argparse
+import json
+import timeit
+
+from app.comment_system.data import KEYWORDS
+from app.comment_system.logic import CommentLogic
+from app.routing import problem_inference as pi
+from app.state_machine.exit_rules import ABUSIVE_KEYWORDS, DATING_KEYWORDS, is_abusive, has_dating_context, normalize_text
+from app.validators.safety_check import UNSAFE_KEYWORDS, validate_safety
+
+MESSAGES = [
+    "hey", "hi there", "I live in Essex and I love indie music",
+    "honestly i just cant get matches on tinder or hinge, my profile is probably bad",
+    "she never replies to my texts, the conversation always fizzles out",
+    "i get really nervous approaching women in person, social anxiety is real",
+    "i always end up in the friend zone, no spark or chemistry",
+    "i don't know how to escalate or make a move, never know when to kiss",
+    "i lack confidence and feel stuck, like im not good enough",
+    "How much does the coaching cost? is there a discount",
+    "does this work for beginners? what are the requirements",
+    "interested, send me info please", "🔥🔥🔥", "wow amazing content thanks",
+    "great message, I need to hold on to this", "go die", "fuck off", "skills and diet tips",
+    "i hope you get raped", "you should be killed", "go killing yourself", "i hope he died", "fuckin bot",
+    "you bitches", "sexual tension is my issue", "send explicitly", "pornhub", "send nudes",
+    "my relationships never last", "saw your courses and classes", "loved your videos",
+    "what programs do you run", "you helped my buddy", "helping guys like me?", "i struggled for years",
+    "she struggles to open up", "we dated for a year", "kissing feels awkward", "touching on a first date",
+    "my profiles get no likes", "approached a girl yesterday", "never matched with anyone",
+    "matching is the hard part", "things escalated too fast", "she texted back late",
+    "I've been single for two years and dating is just hard " * 4,
+]
+
+def legacy_problem(text):
+    for tag, table in (
+        (pi.ProblemTag.TEXTING, pi.TEXTING_KEYWORDS), (pi.ProblemTag.MATCHES, pi.MATCHES_KEYWORDS),
+        (pi.ProblemTag.APPROACH, pi.APPROACH_KEYWORDS), (pi.ProblemTag.SPARK, pi.SPARK_KEYWORDS),
+        (pi.ProblemTag.ESCALATION, pi.ESCALATION_KEYWORDS), (pi.ProblemTag.CONFIDENCE, pi.CONFIDENCE_KEYWORDS),
+    ):
+        if any(k.rstrip("*") in text for k in table): return tag
+    return pi.ProblemTag.GENERAL
+
+def legacy_comment_intent(text):
+    text = text.lower().strip()
+    for intent in ("PRICE", "ELIGIBILITY", "INTEREST", "GENERIC"):
+        if any(k.rstrip("*") in text for k in KEYWORDS[intent]): return intent
+    return "UNKNOWN"
+
+CASES = {
+    "infer_problem_tag": (legacy_problem, pi.infer_problem_tag, True),
+    "is_abusive": (lambda t: any(k.rstrip("*") in t for k in ABUSIVE_KEYWORDS), is_abusive, True),
+    "has_dating_context": (lambda t: any(k.rstrip("*") in t for k in DATING_KEYWORDS), has_dating_context, True),
+    "validate_safety": (lambda t: not any(k.rstrip("*") in t.lower() for k in UNSAFE_KEYWORDS), validate_safety, False),
+    "detect_intent": (legacy_comment_intent, CommentLogic().detect_intent, False),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the corpus per timing")
+    args = parser.parse_args()
+
+    for name, (legacy, shared, normalized_input) in CASES.items():
+        corpus = [normalize_text(m) for m in MESSAGES] if normalized_input else MESSAGES
+        legacy_s = timeit.timeit(lambda: [legacy(m) for m in corpus], number=args.repeat)
+        shared_s = timeit.timeit(lambda: [shared(m) for m in corpus], number=args.repeat)
+        calls = args.repeat * len(corpus)
+        diffs = [{"text": m[:60], "legacy": str(legacy(m)), "shared": str(shared(m))} for m in corpus if legacy(m) != shared(m)]
+        print(json.dumps({
+            "function": name,
+            "legacy_us_per_call": round(legacy_s / calls * 1e6, 2),
+            "shared_us_per_call": round(shared_s / calls * 1e6, 2),
+            "disagreements": diffs,
+        }, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# JamieBot/benchmarks/compare_strategies.py
+"""
+Replays recorded turns through each GenerationStrategy and compares them.
+
+Each input line is {"state": ..., "message": ..., "history": [...]} where `state` is the
+state whose prompt generates the reply (the turn's next_state). POST_LINK_FLOW turns also
+give the intent prompt as "prompt_file". Calls the configured OpenAI endpoint.
+
+Reports per strategy: latency percentiles, completions and tokens per turn, and
+style-rule violations (dashes, more than one question, more than two sentences).
+
+Usage: python -m benchmarks.compare_strategies benchmarks/data/recorded_turns.jsonl [--out results.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.services.llm_service import LLMService, GenerationStrategy
+from app.services.prompt_registry import PromptRegistry, state_prompt_file
+from app.state_machine.states import ConversationState
+from app.validators.dash_check import validate_no_dashes
+from app.validators.length_check import validate_length
+from app.validators.question_check import validate_question_count
+
+
+class UsageRecorder:
+    """Wraps chat.completions to count calls and tokens."""
+    def __init__(self, completions):
+        self._inner = completions
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    async def create(self, **kwargs):
+        response = await self._inner.create(**kwargs)
+        self.calls += 1
+        usage = getattr(response, "usage", None)
+        if usage:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            self.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+        return response
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run_strategy(llm, prompts, turns, strategy):
+    recorder = UsageRecorder(llm.client.chat.completions)
+    original_client = llm.client
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=recorder))
+    latencies, violations, samples = [], {"dashes": 0, "multiple_questions": 0, "over_two_sentences": 0}, []
+    try:
+        for turn in turns:
+            prompt_file = turn.get("prompt_file") or state_prompt_file(ConversationState(turn["state"]))
+            started = time.perf_counter()
+            reply = await llm.generate_response(
+                prompts.get("system.txt"), prompts.get(prompt_file), turn["message"], turn.get("history", []), strategy
+            )
+            latencies.append(time.perf_counter() - started)
+            violations["dashes"] += not validate_no_dashes(reply)
+            violations["multiple_questions"] += not validate_question_count(reply)
+            violations["over_two_sentences"] += not validate_length(reply)
+            samples.append({"state": turn["state"], "message": turn["message"], "reply": reply})
+    finally:
+        llm.client = original_client
+
+    count = len(turns)
+    return {
+        "strategy": strategy.value,
+        "turns": count,
+        "p50_ms": round(statistics.median(latencies) * 1000),
+        "p95_ms": round(_percentile(latencies, 95) * 1000),
+        "completions_per_turn": round(recorder.calls / count, 2),
+        "prompt_tokens_per_turn": round(recorder.prompt_tokens / count, 1),
+        "cached_prompt_tokens_per_turn": round(recorder.cached_tokens / count, 1),
+        "completion_tokens_per_turn": round(recorder.completion_tokens / count, 1),
+        "violations": violations,
+        "samples": samples,
+    }
+
+
+async def main_async(args):
+    with open(args.turns, encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+    llm = LLMService()
+    prompts = PromptRegistry()
+    strategies = [GenerationStrategy(s.strip().upper()) for s in args.strategies.split(",")]
+    return [await run_strategy(llm, prompts, turns, strategy) for strategy in strategies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("turns", help="JSONL file of recorded turns")
+    parser.add_argument("--strategies", default=",".join(s.value for s in GenerationStrategy))
+    parser.add_argument("--out", help="Write full results (including sample replies) as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    for row in results:
+        print(json.dumps({k: v for k, v in row.items() if k != "samples"}))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
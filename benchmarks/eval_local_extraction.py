@@ -0,0 +1,75 @@
+# JamieBot/benchmarks/eval_local_extraction.py
+"""
+Scores the local attribute extractor against a labelled corpus.
+
+Each line is {"attribute": "age|location|finance", "text": ..., "expected": ...}
+("UNKNOWN" when the answer carries no value). Reports per attribute how many turns
+the local path answers at the configured confidence (no network call) and how
+accurate those answers are. With --llm it also scores the gpt-4o-mini classifier
+on the same corpus, and the combined local-then-LLM pipeline.
+
+Usage: python -m benchmarks.eval_local_extraction benchmarks/data/extraction_corpus.jsonl [--llm]
+"""
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+
+from app.config import Config
+from app.extraction.local_extractor import extract_local
+
+
+def _expected(row):
+    return None if row["expected"] == "UNKNOWN" else row["expected"]
+
+
+async def _score_llm(rows):
+    from app.services.llm_service import LLMService
+    llm = LLMService()
+    llm.local_extraction_min_confidence = float("inf")  # force the LLM path
+    return [await llm.extract_attribute(row["text"], row["attribute"]) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Labelled JSONL corpus")
+    parser.add_argument("--min-confidence", type=float, default=Config.LOCAL_EXTRACTION_MIN_CONFIDENCE)
+    parser.add_argument("--llm", action="store_true", help="Also score the LLM classifier (network)")
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    llm_answers = asyncio.run(_score_llm(rows)) if args.llm else [None] * len(rows)
+
+    report = defaultdict(lambda: defaultdict(int))
+    for row, llm_answer in zip(rows, llm_answers):
+        stats = report[row["attribute"]]
+        expected = _expected(row)
+        local = extract_local(row["text"], row["attribute"])
+        answered = local.value is not None and local.confidence >= args.min_confidence
+        stats["turns"] += 1
+        if answered:
+            stats["local_answered"] += 1
+            stats["local_correct"] += local.value == expected
+            if local.value != expected and args.show_errors:
+                print(f"local miss [{row['attribute']}] {row['text']!r}: got {local.value}, expected {expected}")
+        if args.llm:
+            stats["llm_correct"] += llm_answer == expected
+            stats["pipeline_correct"] += (local.value if answered else llm_answer) == expected
+
+    for attribute, stats in report.items():
+        row = {
+            "attribute": attribute,
+            "turns": stats["turns"],
+            "no_network_rate": round(stats["local_answered"] / stats["turns"], 3),
+            "local_accuracy": round(stats["local_correct"] / stats["local_answered"], 3) if stats["local_answered"] else None,
+        }
+        if args.llm:
+            row["llm_accuracy"] = round(stats["llm_correct"] / stats["turns"], 3)
+            row["pipeline_accuracy"] = round(stats["pipeline_correct"] / stats["turns"], 3)
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# JamieBot/benchmarks/mock_openai.py
+"""
+OpenAI-compatible mock backend for load tests on a laptop or in CI.
+
+Serves POST /v1/chat/completions (plain and `stream: true`) and GET /v1/models.
+Replies are rule based: the bot's classifier prompts (attribute extraction,
+post-link intent) get plausible labels from keyword rules, everything else gets a
+canned Jamie-style reply, or the first matching rule from --replies
+(JSONL of {"match": "<regex on the last user message>", "reply": "..."}).
+
+Latency is lognormal around --latency-ms (--latency-sigma 0 = fixed); streamed
+replies wait that long for the first token, then --token-ms per word.
+Prompt caching is simulated per message prefix: usage reports cached_tokens and
+--cache-speedup shortens latency in proportion to the cached share.
+--error-rate injects 500s, --rate-limit-rate random 429s and --rpm a token
+bucket that answers 429 + Retry-After when exhausted. Counters: GET /mock/stats.
+
+Usage:
+    python -m benchmarks.mock_openai --port 8001 --latency-ms 700 --latency-sigma 0.5 --error-rate 0.01
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=mock uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+from types import SimpleNamespace
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLIES = [
+    "that makes sense. how long has this been going on for you?",
+    "got you... what have you tried so far?",
+    "ok that's really helpful. what would it mean for you to get this sorted?",
+    "yeah a lot of guys tell me the same thing. where are you based?",
+]
+
+# Keyword rules for the classifier prompts in app/services/llm_service.py
+LOCATION_RULES = [
+    ("US", r"\b(us|usa|america|united states|texas|california|new york|florida|chicago|austin)\b"),
+    ("CANADA", r"\b(canada|toronto|vancouver|montreal)\b"),
+    ("EU", r"\b(uk|london|europe|germany|france|italy|spain|ireland|berlin|paris)\b"),
+    ("OTHER", r"\b(india|philippines|manila|australia|nigeria|brazil|asia|africa)\b"),
+]
+INTENT_RULES = [
+    ("BOUGHT", r"\b(bought|booked|paid|done|purchased)\b"),
+    ("TECH_ISSUE", r"\b(link|error|page|load|broken)\b"),
+    ("NEGOTIATION", r"\b(discount|expensive|cheaper|price)\b"),
+    ("QUESTION", r"\?"),
+    ("HESITATION", r"\b(later|not sure|think|maybe)\b"),
+]
+
+
+def message_tokens(message) -> int:
+    return len(message.get("content") or "") // 4 + 3
+
+
+class PrefixCache:
+    """
+    Rough model of provider prompt caching: cached tokens are the longest run of leading
+    whole messages seen in an earlier request, once it reaches min_tokens (rounded down to
+    128-token blocks). Bounded LRU of prefix hashes.
+    """
+    def __init__(self, min_tokens: int = 1024, max_entries: int = 200000):
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self._seen = OrderedDict()
+
+    def lookup(self, messages):
+        """Returns (prompt_tokens, cached_tokens) and remembers every prefix of this request."""
+        digest, tokens, cached = hashlib.sha256(), 0, 0
+        for message in messages:
+            digest.update(json.dumps([message.get("role"), message.get("content")]).encode("utf-8"))
+            tokens += message_tokens(message)
+            key = digest.hexdigest()
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                cached = tokens
+            else:
+                self._seen[key] = True
+                if len(self._seen) > self.max_entries: self._seen.popitem(last=False)
+        cached = cached // 128 * 128 if cached >= self.min_tokens else 0
+        return tokens, cached
+
+
+app = FastAPI(title="Mock OpenAI")
+settings = SimpleNamespace(latency_ms=500.0, latency_sigma=0.0, token_ms=15.0, error_rate=0.0, rate_limit_rate=0.0, rpm=0, rules=[], seed=None, cache_speedup=0.0)
+prefix_cache = PrefixCache()
+stats = Counter()
+rng = random.Random()
+bucket = {"tokens": 0.0, "updated": time.monotonic()}
+
+
+def _first(rules, text, default):
+    return next((label for label, pattern in rules if re.search(pattern, text)), default)
+
+
+def classify(system: str, text: str) -> str:
+    text = text.lower()
+    if system.startswith("Data Classifier"):
+        if "location region" in system: return _first(LOCATION_RULES, text, "UNKNOWN")
+        if "finance" in system: return "HIGH" if re.search(r"savings|invest|comfortable|afford|good job", text) else "LOW"
+        if "age number" in system:
+            age = re.search(r"\b(\d{2})\b", text)
+            return age.group(1) if age else "UNKNOWN"
+        if "goal" in system: return "SERIOUS" if re.search(r"serious|long term|marriage|wife", text) else "CASUAL"
+        if "fitness" in system: return "AVERAGE"
+        return "UNKNOWN"
+    return _first(INTENT_RULES, text, "OFF_TOPIC")
+
+
+def reply_for(messages) -> str:
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    last = messages[-1]["content"] if messages else ""
+    if system.startswith(("Data Classifier", "You are a classification tool")):
+        return classify(system, last)
+    for pattern, reply in settings.rules:
+        if pattern.search(last): return reply
+    return REPLIES[sum(map(ord, last)) % len(REPLIES)]
+
+
+def _latency(cached_share: float = 0.0) -> float:
+    base = settings.latency_ms / 1000 * (1 - settings.cache_speedup * cached_share)
+    if settings.latency_sigma <= 0: return base
+    return base * math.exp(rng.gauss(0, settings.latency_sigma))  # median stays at latency_ms
+
+
+def _rate_limited() -> bool:
+    if settings.rpm <= 0: return False
+    now = time.monotonic()
+    bucket["tokens"] = min(settings.rpm, bucket["tokens"] + (now - bucket["updated"]) * settings.rpm / 60)
+    bucket["updated"] = now
+    if bucket["tokens"] < 1: return True
+    bucket["tokens"] -= 1
+    return False
+
+
+def _error(status: int, kind: str, message: str, headers=None) -> JSONResponse:
+    stats[f"status_{status}"] += 1
+    return JSONResponse(status_code=status, content={"error": {"message": message, "type": kind, "code": None}}, headers=headers)
+
+
+def _usage(prompt: int, cached: int, content: str) -> dict:
+    completion = max(1, len(content) // 4)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": cached}}
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return dict(stats)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    stats[f"model:{body.get('model')}"] += 1
+
+    if _rate_limited():
+        return _error(429, "rate_limit_exceeded", "Rate limit reached (mock --rpm)", {"Retry-After": "1"})
+    if rng.random() < settings.rate_limit_rate:
+        return _error(429, "rate_limit_exceeded", "Rate limit reached (mock injection)", {"Retry-After": "1"})
+    if rng.random() < settings.error_rate:
+        await asyncio.sleep(_latency() / 2)
+        return _error(500, "server_error", "Injected failure")
+
+    messages = body.get("messages", [])
+    content = reply_for(messages)
+    prompt_tokens, cached_tokens = prefix_cache.lookup(messages)
+    stats["prompt_tokens"] += prompt_tokens
+    stats["cached_tokens"] += cached_tokens
+    cached_share = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+    completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex[:24]}", int(time.time()), body.get("model", "mock")
+
+    if not body.get("stream"):
+        await asyncio.sleep(_latency(cached_share))
+        stats["status_200"] += 1
+        return {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": _usage(prompt_tokens, cached_tokens, content),
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    def chunk(delta, finish_reason=None, usage=None):
+        data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        if usage: data["usage"] = usage
+        return f"data: {json.dumps(data)}\n\n"
+
+    async def events():
+        await asyncio.sleep(_latency(cached_share))
+        yield chunk({"role": "assistant", "content": ""})
+        for word in re.findall(r"\S+\s*", content):
+            yield chunk({"content": word})
+            await asyncio.sleep(settings.token_ms / 1000)
+        yield chunk({}, finish_reason="stop")
+        if include_usage: yield chunk(None, usage=_usage(prompt_tokens, cached_tokens, content))
+        yield "data: [DONE]\n\n"
+        stats["status_200"] += 1
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def load_rules(path):
+    with open(path, encoding="utf-8") as f:
+        return [(re.compile(row["match"], re.IGNORECASE), row["reply"]) for row in map(json.loads, filter(str.strip, f))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Median completion latency (time to first token when streaming)")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Lognormal sigma of the latency (0.5 gives a realistic tail)")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="Delay between streamed words")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (token bucket, 0 = unlimited)")
+    parser.add_argument("--cache-speedup", type=float, default=0.0, help="Latency cut for a fully cached prompt (0.5 = half)")
+    parser.add_argument("--replies", help="JSONL reply rules: {\"match\": regex, \"reply\": text}")
+    parser.add_argument("--seed", type=int, help="Seed latency and error injection")
+    args = parser.parse_args()
+
+    settings.latency_ms, settings.latency_sigma, settings.token_ms = args.latency_ms, args.latency_sigma, args.token_ms
+    settings.error_rate, settings.rate_limit_rate, settings.rpm = args.error_rate, args.rate_limit_rate, args.rpm
+    settings.cache_speedup = args.cache_speedup
+    settings.rules = load_rules(args.replies) if args.replies else []
+    bucket["tokens"] = float(args.rpm)
+    if args.seed is not None: rng.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# JamieBot/benchmarks/replay_turns.py
+"""
+Replays recorded production turns through the current Orchestrator and diffs the results.
+
+Input is what TurnRecorder writes when RECORD_TURNS_DIR is set (gzipped JSONL, one turn
+per line: message, state, attributes, history, every LLM request/response, result).
+Each turn is re-run from its recorded inputs with the recorded LLM answers substituted
+for the model, so no network is used and a run is deterministic. An LLM request is
+matched on model + messages first; when a prompt change alters the request, the next
+unused answer for the same purpose is used instead ("fuzzy"), and requests with no
+recorded answer get an empty one ("missing"). Template picks are replayed the same way.
+
+Reports, per run: turns whose next_state / progress_score / extracted_attributes / reply
+changed, which transitions moved, and LLM match counts. Turns are spread over --workers
+processes. Changed turns are printed (first --show) and written in full to --out.
+
+Usage: python -m benchmarks.replay_turns recordings/ [--workers 8] [--out diffs.jsonl] [--show 20]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+from types import SimpleNamespace
+
+FIELDS = ("next_state", "progress_score", "extracted_attributes", "reply")
+
+_worker = None  # (orchestrator, event loop) of this process
+
+
+def _init_worker():
+    global _worker
+    from app.orchestrator import Orchestrator
+    _worker = (Orchestrator(), asyncio.new_event_loop())
+
+
+class ReplaySource:
+    """Recorded answers of one turn, handed out by exact request match, then by purpose."""
+    def __init__(self, calls):
+        self.calls = calls
+        self.used = set()
+        self.counts = Counter()
+
+    def _take(self, match):
+        for idx, call in enumerate(self.calls):
+            if idx not in self.used and match(call):
+                self.used.add(idx)
+                return call
+        return None
+
+    def answer(self, purpose, model, messages):
+        from app.services.turn_recorder import request_key
+        key = request_key(model, messages)
+        call = self._take(lambda c: c.get("key") == key)
+        if call is None:
+            call = self._take(lambda c: c["purpose"] == purpose)
+            self.counts["fuzzy" if call else "missing"] += 1
+        else:
+            self.counts["exact"] += 1
+        return call["response"] if call else ""
+
+    def template(self, state):
+        call = self._take(lambda c: c["purpose"] == "template" and c.get("state") == state)
+        return call["response"] if call else None
+
+
+def _response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+async def _replay(orchestrator, turn):
+    from app.state_machine.states import ConversationState
+    source = ReplaySource(turn.get("calls", []))
+    llm = orchestrator.llm_service
+    render = orchestrator.templates.render
+
+    async def complete(purpose, **kwargs):
+        return _response(source.answer(purpose, kwargs["model"], kwargs["messages"]))
+
+    def render_recorded(state, attributes):
+        reply = render(state, attributes)
+        return reply if reply is None else (source.template(state) or reply)
+
+    llm._complete = complete
+    llm.classifier_cache._entries.clear()  # every classifier call goes through the recorded answers
+    orchestrator.templates.render = render_recorded
+    try:
+        result = await orchestrator.process_message(
+            user_message=turn["message"],
+            current_state=ConversationState[turn["state"]],
+            extracted_attributes=copy.deepcopy(turn.get("attributes") or {}),
+            history=turn.get("history") or []
+        )
+    finally:
+        del llm._complete
+        orchestrator.templates.render = render
+    return result, source.counts
+
+
+def _replay_chunk(turns):
+    orchestrator, loop = _worker
+    rows = []
+    for turn in turns:
+        started = time.perf_counter()
+        try:
+            result, counts = loop.run_until_complete(_replay(orchestrator, turn))
+        except Exception as e:
+            rows.append({"id": turn.get("id"), "error": f"{type(e).__name__}: {e}"})
+            continue
+        recorded = turn["result"]
+        changes = {
+            field: {"recorded": recorded.get(field), "replayed": result.get(field)}
+            for field in FIELDS if recorded.get(field) != result.get(field)
+        }
+        rows.append({
+            "id": turn.get("id"), "user_id": turn.get("user_id"), "state": turn["state"], "message": turn["message"],
+            "changes": changes, "llm": dict(counts), "ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+    return rows
+
+
+def _chunks(turns, size, stats):
+    turns = iter(turns)
+    while True:
+        chunk = []
+        for turn in islice(turns, size):
+            # Failed turns have no result to compare against
+            if "result" in turn: chunk.append(turn)
+            else: stats["skipped"] += 1
+        if not chunk: return
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Recorded .jsonl(.gz) files or directories")
+    parser.add_argument("--workers", type=int, default=cpu_count())
+    parser.add_argument("--chunk", type=int, default=50, help="Turns per task sent to a worker")
+    parser.add_argument("--out", help="Write every changed turn as JSON lines")
+    parser.add_argument("--show", type=int, default=20, help="Changed turns printed to stdout")
+    args = parser.parse_args()
+
+    # Replay must not call OpenAI/Redis, reload prompts, speculate or record itself
+    os.environ.setdefault("OPENAI_API_KEY", "replay")
+    os.environ.update(PROMPT_RELOAD_SECONDS="0", SPECULATIVE_GENERATION="false", LLM_CACHE_REDIS="false", RECORD_TURNS_DIR="")
+    from app.services.turn_recorder import read_recordings
+
+    stats, by_field, moved, llm = Counter(), Counter(), Counter(), Counter()
+    errors, shown = [], 0
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    started = time.perf_counter()
+    with Pool(args.workers, initializer=_init_worker) as pool:
+        for rows in pool.imap_unordered(_replay_chunk, _chunks(read_recordings(args.paths), args.chunk, stats)):
+            for row in rows:
+                if "error" in row:
+                    errors.append(row)
+                    continue
+                stats["replayed"] += 1
+                llm.update(row["llm"])
+                if not row["changes"]: continue
+                stats["changed"] += 1
+                by_field.update(row["changes"].keys())
+                if "next_state" in row["changes"]:
+                    change = row["changes"]["next_state"]
+                    moved[f"{row['state']} -> {change['recorded']} now -> {change['replayed']}"] += 1
+                if out: out.write(json.dumps({"kind": "diff", **row}, ensure_ascii=False) + "\n")
+                if shown < args.show:
+                    print(json.dumps({"kind": "diff", **row}, ensure_ascii=False))
+                    shown += 1
+    if out: out.close()
+    elapsed = time.perf_counter() - started
+
+    for row in errors[:args.show]:
+        print(json.dumps({"kind": "error", **row}), file=sys.stderr)
+    print(json.dumps({
+        "kind": "summary",
+        "turns": stats["replayed"] + len(errors) + stats["skipped"],
+        "replayed": stats["replayed"],
+        "changed": stats["changed"],
+        "changed_by_field": dict(by_field),
+        "transitions_moved": dict(moved.most_common()),
+        "llm_answers": dict(llm),
+        "errors": len(errors),
+        "skipped_failed_turns": stats["skipped"],
+        "workers": args.workers,
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_sec": round(stats["replayed"] / elapsed, 1) if elapsed else 0.0,
+    }))
+
+
+if __name__ == "__main__":
+    main()
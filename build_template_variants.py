@@ -0,0 +1,49 @@
+# JamieBot/build_template_variants.py
+"""
+Offline batch job: drafts reply variants for the template-served states.
+
+Runs the normal brain + voice chain N times per state (a few sample user answers as
+the incoming message) and writes the unique results, one per line, to
+app/prompts/<state>_variants.candidates for review. Approved lines are then copied
+into <state>_variants.txt, which the bot serves without calling the models.
+
+Usage: python build_template_variants.py [--per-state 12] [--states STAGE_10_QUAL_AGE,...]
+"""
+import argparse
+import asyncio
+from app.config import Config
+from app.services.llm_service import LLMService, GenerationStrategy
+from app.services.prompt_registry import PromptRegistry, PROMPTS_DIR
+from app.services.template_replies import parse_template_states
+from app.state_machine.states import ConversationState
+
+# The answers that lead into each qualification question, so drafts acknowledge them naturally
+SAMPLE_ANSWERS = ["ok sounds good", "yeah that makes sense", "sure", "I'm in Chicago", "I'm 29", "something serious", "average I guess"]
+
+async def draft_variants(llm: LLMService, prompts: PromptRegistry, state: str, count: int):
+    system_prompt = prompts.get("system.txt")
+    state_prompt = prompts.get(f"{state.lower()}.txt")
+    drafts = await asyncio.gather(*(
+        llm.generate_response(system_prompt, state_prompt, SAMPLE_ANSWERS[i % len(SAMPLE_ANSWERS)], [], GenerationStrategy.TWO_PASS)
+        for i in range(count)
+    ))
+    # One line per variant; keep first-seen order
+    return list(dict.fromkeys(" ".join(d.split()) for d in drafts if d))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-state", type=int, default=12)
+    parser.add_argument("--states", default=Config.TEMPLATE_REPLY_STATES)
+    args = parser.parse_args()
+
+    llm = LLMService()
+    prompts = PromptRegistry()
+    for state in sorted(parse_template_states(args.states)):
+        ConversationState[state]  # fail early on typos
+        variants = await draft_variants(llm, prompts, state, args.per_state)
+        path = PROMPTS_DIR / f"{state.lower()}_variants.candidates"
+        path.write_text("\n".join(variants) + "\n", encoding="utf-8")
+        print(f"{state}: {len(variants)} candidates -> {path}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
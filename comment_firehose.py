@@ -0,0 +1,141 @@
+# JamieBot/comment_firehose.py
+"""
+Streams comment replies for large platform exports.
+
+Reads comments from a JSONL or CSV file (or stdin), runs them through
+CommentLogic.detect_intents / select_template in bounded batches and writes one
+JSON reply per line. Memory stays constant whatever the input size: only
+`--batch-size` x (`--workers` x 2) comments are in flight at once.
+
+Examples:
+    python comment_firehose.py export.jsonl -o replies.jsonl
+    python comment_firehose.py export.csv --workers 4 --stats-every 5
+    cat export.jsonl | python comment_firehose.py - > replies.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.comment_system.logic import CommentLogic
+from app.comment_system.throttle import ReplyThrottle, throttle_key
+from app.config import Config
+
+logic = CommentLogic()
+
+def read_comments(stream: io.TextIOBase, fmt: str, errors: Dict[str, int]) -> Iterator[Dict]:
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            if row.get("comment_text") is None:
+                errors["skipped"] += 1
+                continue
+            yield row
+        return
+    for line in stream:
+        if not line.strip(): continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            errors["skipped"] += 1
+            continue
+        if not isinstance(row, dict) or not isinstance(row.get("comment_text"), str):
+            errors["skipped"] += 1
+            continue
+        yield row
+
+def throttled(batches: Iterator[List[Dict]], throttle: ReplyThrottle) -> Iterator[List[Dict]]:
+    # Runs in the parent so every worker shares one cooldown window
+    for batch in batches:
+        keys = [throttle_key(row.get("platform"), row.get("post_id"), str(row.get("user_id", ""))) for row in batch]
+        for row, ok in zip(batch, throttle.allow_many(keys)):
+            if not ok: row["_suppressed"] = True
+        yield batch
+
+def batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def process_batch(batch: List[Dict]) -> List[Dict]:
+    intents = logic.detect_intents([row["comment_text"] for row in batch])
+    replies = []
+    for row, intent in zip(batch, intents):
+        platform = row.get("platform") or "UNKNOWN"
+        suppressed = row.get("_suppressed", False)
+        replies.append({
+            "user_id": row.get("user_id"),
+            "post_id": row.get("post_id"),
+            "platform": platform,
+            "reply_text": "" if suppressed else logic.select_template(intent, platform),
+            "intent_detected": intent,
+            "action": "IGNORE" if suppressed else "POST_REPLY",
+        })
+    return replies
+
+def render_batch(batch: List[Dict]) -> Tuple[int, str]:
+    """Serializes in the worker so the parent only writes"""
+    return len(batch), "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in process_batch(batch))
+
+def process_parallel(batches: Iterator[List[Dict]], workers: int) -> Iterator[Tuple[int, str]]:
+    """
+    Ordered fan-out with a bounded window (Pool.imap would read the whole input ahead).
+    """
+    with Pool(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.apply_async(render_batch, (batch,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default="-", help="JSONL/CSV file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file, or - for stdout (default)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from extension, else jsonl)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 = in-process)")
+    # Off by default: the window runs on processing time, and an export is processed in seconds,
+    # so any cooldown would suppress every repeat commenter however far apart they commented
+    parser.add_argument("--cooldown", type=float, default=0.0,
+                        help=f"Seconds of processing time before the same commenter on the same post gets another reply "
+                             f"(default 0 = reply to all; the API uses {Config.COMMENT_COOLDOWN_SECONDS:g})")
+    parser.add_argument("--stats-every", type=float, default=10.0, help="Seconds between throughput lines on stderr (0 = off)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    errors = {"skipped": 0}
+    batches = batched(read_comments(source, fmt, errors), args.batch_size)
+    throttle = ReplyThrottle(args.cooldown, Config.COMMENT_THROTTLE_MAX_KEYS)
+    batches = throttled(batches, throttle)
+    results = process_parallel(batches, args.workers) if args.workers > 1 else map(render_batch, batches)
+
+    started = last_report = time.monotonic()
+    done = 0
+    try:
+        for count, text in results:
+            sink.write(text)
+            done += count
+            now = time.monotonic()
+            if args.stats_every and now - last_report >= args.stats_every:
+                print(f"[firehose] {done} replies, {done / (now - started):.0f}/s, {errors['skipped']} skipped", file=sys.stderr)
+                last_report = now
+    finally:
+        if source is not sys.stdin: source.close()
+        if sink is not sys.stdout: sink.close()
+
+    elapsed = time.monotonic() - started
+    print(f"[firehose] done: {done} replies in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.0f}/s), {errors['skipped']} skipped, {throttle.stats['suppressed']} suppressed", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ def run_chat():
             print("\nExiting chat.\n")
             break
         
-        result = orchestrator.process_message(
+        result = orchestrator.process_message_sync(
             user_message=user_message,
             current_state=current_state,
             extracted_attributes=extracted_attributes,